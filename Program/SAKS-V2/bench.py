@@ -0,0 +1,163 @@
+#!/usr/bin/python
+'''
+bench.py, benchmarks of the hardware driver hot paths on the simulated board
+
+  python bench.py                   run, print the results and compare them with bench_baseline.json
+  python bench.py -o results.json   also save the results
+  python bench.py --save-baseline   save the results as the new baseline
+
+Every benchmark reports wall time, CPU time, GPIO calls and pin bank writes/elided writes per operation.
+Exits with 1 when an operation makes more GPIO calls (not counting the input reads of polling loops) or
+more pin writes than the baseline. The times vary from run to run, they are reported but not judged.
+'''
+
+import os, sys, time, json, imp, argparse
+
+os.environ['SAKS_GPIO'] = 'sim'
+os.environ['SAKS_SIM_BOARD'] = 'saks-v2'
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from entities import gpio
+from entities.pinbank import bank
+from sakspins import SAKSPins as PINS
+
+BASELINE = os.path.join(HERE, 'bench_baseline.json')
+COUNT_TOLERANCE = 0.05 # more GPIO calls or pin writes per operation than the baseline is a regression
+cpu_time = getattr(time, 'process_time', None) or time.clock
+board = gpio.board
+
+class NullWriter(object):
+  def write(self, s):
+    pass
+  def flush(self):
+    pass
+
+def measure(op, iterations, pause = 0):
+  '''
+  Run op(i) for i in range(iterations)
+  :param pause: seconds to sleep between the operations, not measured
+  :return: dict of the costs per operation
+  '''
+  board.reset_calls()
+  bank.reset_counters()
+  wall = cpu = 0.0
+  for i in range(iterations):
+    if pause:
+      time.sleep(pause)
+    w0, c0 = time.time(), cpu_time()
+    op(i)
+    wall, cpu = wall + time.time() - w0, cpu + cpu_time() - c0
+  calls = sum(board.calls.values())
+  return {
+    'iterations': iterations,
+    'wall': wall / iterations,
+    'cpu': cpu / iterations,
+    'gpio_calls': float(calls) / iterations,
+    'gpio_reads': float(board.calls['input']) / iterations, # as many as a polling loop has time for
+    'pin_writes': float(bank.writes) / iterations,
+    'pin_elided': float(bank.elided) / iterations,
+  }
+
+def bench_hcsr04(results):
+  from entities import HCSR04
+  gpio.GPIO.setmode(gpio.GPIO.BCM)
+  sonar = HCSR04({'trig': PINS.UART_TXD, 'echo': PINS.UART_RXD}, HCSR04.MODE_EDGE, max_range = 80)
+  board.sonar.distance = 60
+  # pause like the ranging service does, the sensor ignores triggers while it is busy
+  results['hcsr04.get_distance[edge]'] = measure(lambda i: sonar.get_distance(), 50, 0.01)
+  sonar.set_mode(HCSR04.MODE_POLL)
+  results['hcsr04.get_distance[poll]'] = measure(lambda i: sonar.get_distance(), 50, 0.01)
+
+def bench_saks(results):
+  from sakshat import SAKSHAT
+  results['sakshat.init'] = measure(lambda i: SAKSHAT(), 5)
+  saks = SAKSHAT()
+  for name in ('digital_display', 'ledrow', 'ds18b20'): # built on first use, not while measuring
+    getattr(saks, name)
+  frames = ['C 87', '12.34']
+  results['tm1637.show'] = measure(lambda i: saks.digital_display.show(frames[i % 2]), 10)
+  saks.digital_display.show(frames[0]) # the loop above left the other frame showing
+  results['tm1637.show[unchanged]'] = measure(lambda i: saks.digital_display.show(frames[0]), 10)
+  assert results['tm1637.show[unchanged]']['gpio_calls'] < 0.5, 'tm1637.show writes an unchanged frame again'
+  ic = saks.ledrow.ic
+  results['ic_74hc595.set_data'] = measure(lambda i: ic.set_data(0x55 if i % 2 else 0xaa), 200)
+  from entities import IC_74HC595
+  spi_ic = IC_74HC595({'ds': PINS.IC_74HC595_DS, 'shcp': PINS.IC_74HC595_SHCP, 'stcp': PINS.IC_74HC595_STCP}, gpio.GPIO.HIGH, spi = board.spi())
+  results['ic_74hc595.set_data[spi]'] = measure(lambda i: spi_ic.set_data(0x55 if i % 2 else 0xaa), 200)
+  rows = [[1, 0, 1, 0, 1, 0, 1, 0], [0, 1, 0, 1, 0, 1, 0, 1]]
+  results['led74hc595.set_row'] = measure(lambda i: saks.ledrow.set_row(rows[i % 2]), 100)
+  results['ds18b20.read_temp'] = measure(lambda i: saks.ds18b20.read_temp(), 20)
+  from entities import DS18B20Bus
+  w1 = DS18B20Bus()
+  results['ds18b20bus.read_all'] = measure(lambda i: w1.read_all(), 20)
+
+def bench_sitcat(results):
+  import sitcat
+  stdout, sys.stdout = sys.stdout, NullWriter()
+  try:
+    sitcat.init()
+    sitcat.start()
+    sitcat.ranging.wait_sample(timeout = 1.0)
+    sitcat.ranging.stop() # its pings would be counted as well, the tick takes the sample it left
+    sitcat.tick() # builds the devices the loop uses
+    results['sitcat.tick'] = measure(lambda i: sitcat.tick(), 10)
+  finally:
+    sitcat.done()
+    sys.stdout = stdout
+
+def bench_v1_display(results):
+  # last, as the v1 display pins overlap with the SAKS v2 devices
+  v1 = imp.load_source('sitcat_v1', os.path.join(HERE, '..', 'sitcat.py'))
+  display = v1.DigitalDisplay(start = False)
+  display.show('12.34')
+  display.step() # plans the frame
+  results['v1.digital_display.step'] = measure(lambda i: display.step(), 40)
+  frames = ['C 87', '12.34']
+  results['v1.digital_display.step[new frame]'] = measure(lambda i: (display.show(frames[i % 2]), display.step()), 20)
+
+def compare(results, baseline):
+  '''
+  Print the results next to the baseline
+  :return: names of the regressed benchmarks
+  '''
+  regressed = []
+  print '%-36s %10s %10s %10s %10s %10s  %s' % ('benchmark', 'wall ms', 'cpu ms', 'gpio', 'writes', 'elided', 'vs baseline')
+  for name in sorted(results):
+    r = results[name]
+    note = ''
+    b = baseline.get(name)
+    if b:
+      note = 'wall x%.2f, gpio %+.1f, writes %+.1f' % (r['wall'] / b['wall'] if b['wall'] else 0,
+        r['gpio_calls'] - b['gpio_calls'], r['pin_writes'] - b['pin_writes'])
+      calls, base_calls = [x['gpio_calls'] - x.get('gpio_reads', 0) for x in (r, b)]
+      if calls > base_calls + COUNT_TOLERANCE or r['pin_writes'] > b['pin_writes'] + COUNT_TOLERANCE:
+        regressed.append(name)
+        note += '  REGRESSED'
+    print '%-36s %10.3f %10.3f %10.1f %10.1f %10.1f  %s' % (name, r['wall'] * 1000, r['cpu'] * 1000, r['gpio_calls'],
+      r.get('pin_writes', 0), r.get('pin_elided', 0), note)
+  return regressed
+
+def main():
+  parser = argparse.ArgumentParser(description = 'Benchmark the hardware drivers on the simulated board')
+  parser.add_argument('-o', '--output', help = 'save the results to this JSON file')
+  parser.add_argument('--baseline', default = BASELINE, help = 'baseline JSON file to compare with')
+  parser.add_argument('--save-baseline', action = 'store_true', help = 'save the results as the baseline')
+  args = parser.parse_args()
+
+  results = {}
+  for bench in (bench_hcsr04, bench_saks, bench_sitcat, bench_v1_display):
+    bench(results)
+  report = {'python': sys.version.split()[0], 'backend': gpio.BACKEND, 'results': results}
+
+  baseline = {}
+  if os.path.exists(args.baseline):
+    baseline = json.load(open(args.baseline))['results']
+  regressed = compare(results, baseline)
+  for path in [args.output, args.baseline if args.save_baseline else None]:
+    if path:
+      json.dump(report, open(path, 'w'), indent = 2, sort_keys = True)
+  return 1 if regressed and not args.save_baseline else 0
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -1,12 +1,52 @@
-from .buzzer import Buzzer
-from .led import Led
-from .led import LedRow
-from .ds18b20 import DS18B20
-from .digital_display import DigitalDisplay
-from .dip_switch_2bit import DipSwitch2Bit
-from .tact import Tact
-from .tact import TactRow
-from .ic_74hc595 import IC_74HC595
-from .led_74hc595 import Led74HC595
-from .ic_tm1637 import IC_TM1637
-from .digital_display_tm1637 import DigitalDisplayTM1637
+import sys
+import importlib
+from types import ModuleType
+
+# name: submodule, each submodule is imported on the first use of one of its names
+_exports = {
+    'Buzzer': 'buzzer',
+    'Led': 'led',
+    'LedRow': 'led',
+    'DS18B20': 'ds18b20',
+    'DS18B20Bus': 'ds18b20',
+    'DigitalDisplay': 'digital_display',
+    'DipSwitch2Bit': 'dip_switch_2bit',
+    'Tact': 'tact',
+    'TactRow': 'tact',
+    'IC_74HC595': 'ic_74hc595',
+    'open_spi': 'ic_74hc595',
+    'Led74HC595': 'led_74hc595',
+    'IC_TM1637': 'ic_tm1637',
+    'DigitalDisplayTM1637': 'digital_display_tm1637',
+    'HCSR04': 'hcsr04',
+    'speed_of_sound': 'hcsr04',
+    'SampleRing': 'ranging',
+    'RangingService': 'ranging',
+    'FrameCompiler': 'glyphs',
+    'PinBank': 'pinbank',
+    'PulseEngine': 'pulse',
+    'EventQueue': 'events',
+    'Scheduler': 'scheduler',
+}
+__all__ = sorted(_exports)
+
+class _LazyModule(ModuleType):
+    '''
+    The entities package, importing the drivers as they are used instead of all of them up front
+    '''
+    def __getattr__(self, name):
+        if name not in _exports:
+            raise AttributeError("module '%s' has no attribute '%s'" % (__name__, name))
+        value = getattr(importlib.import_module('.' + _exports[name], __name__), name)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(_exports))
+
+# python 2 has no module __getattr__, swap the module for one that can. The old module is kept,
+# python 2 clears the globals of a module once it is collected
+_module = _LazyModule(__name__, __doc__)
+_module.__dict__.update(sys.modules[__name__].__dict__)
+_module._original = sys.modules[__name__]
+sys.modules[__name__] = _module
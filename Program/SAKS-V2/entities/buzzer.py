@@ -16,16 +16,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import RPi.GPIO as GPIO
-import time
+from .gpio import GPIO
+from .pinbank import bank
+from .scheduler import scheduler
+from collections import deque
+from threading import RLock
 
 class Buzzer(object):
     '''
-    Buzzer class
+    Buzzer class, beeps are patterns played from the scheduler, the callers do not wait for them
     '''
-    __pin = 0
-    __real_true = GPIO.HIGH
-    __is_on = False
+    __slots__ = ('__pin', '__real_true', '__is_on', '__queue', '__playing', '__steps', '__task', '__generation',
+        '__pwm', '__tone', '__toning', '__lock')
 
     def __init__(self, pin, real_true = GPIO.HIGH):
         '''
@@ -36,6 +38,16 @@ class Buzzer(object):
         '''
         self.__pin = pin
         self.__real_true = real_true
+        self.__is_on = False
+        self.__queue = deque()
+        self.__playing = None
+        self.__steps = None
+        self.__task = None
+        self.__generation = 0
+        self.__pwm = None
+        self.__toning = False
+        self.__tone = None
+        self.__lock = RLock()
 
     #Stauts.
     @property
@@ -46,13 +58,27 @@ class Buzzer(object):
         '''
         return self.__is_on
 
+    @property
+    def is_playing(self):
+        '''
+        Get whether a pattern is playing
+        '''
+        return self.__playing is not None
+
+    @property
+    def pending(self):
+        '''
+        Get the number of patterns queued after the one playing
+        '''
+        return len(self.__queue)
+
     #Verbs.
     def on(self):
         '''
         Set buzzer on
         :return: void
         '''
-        GPIO.output(self.__pin, self.__real_true)
+        bank.output(self.__pin, self.__real_true)
         self.__is_on = True
 
     def off(self):
@@ -60,29 +86,121 @@ class Buzzer(object):
         Set buzzer off
         :return: void
         '''
-        GPIO.output(self.__pin, not self.__real_true)
+        bank.output(self.__pin, not self.__real_true)
         self.__is_on = False
 
+    def play(self, pattern, tone = None, preempt = False, coalesce = True):
+        '''
+        Queue a pattern and return at once
+        e.g. play([(0.01, 0.05, 5)]) for 5 short beeps
+        :param pattern: (on seconds, off seconds, repeat times) tuples, or just one of them
+        :param tone: hertz of a PWM tone during the on times, None to drive the pin steadily
+        :param preempt: stop the pattern playing and drop the queued ones first
+        :param coalesce: skip the pattern if the same one is playing or queued already
+        :return: True if queued, False if coalesced
+        '''
+        if not isinstance(pattern[0], (list, tuple)):
+            pattern = [pattern]
+        item = (tuple([(tuple(p) + (1,))[:3] for p in pattern]), tone)
+        with self.__lock:
+            if preempt:
+                self.__queue.clear()
+                self.silence()
+            elif coalesce and (item == self.__playing or item in self.__queue):
+                return False
+            self.__queue.append(item)
+            if self.__playing is None:
+                self.play_next()
+        return True
+
+    def stop(self):
+        '''
+        Stop the pattern playing and drop the queued ones
+        :return: void
+        '''
+        with self.__lock:
+            self.__queue.clear()
+            self.silence()
+
+    def silence(self):
+        if self.__task is not None:
+            self.__task.cancel()
+            self.__task = None
+        self.__generation += 1
+        self.__playing = self.__steps = None
+        self.sound(False)
+
+    def play_next(self):
+        if not self.__queue:
+            self.__playing = self.__steps = None
+            return
+        self.__playing = self.__queue.popleft()
+        self.__steps = deque()
+        for on, off, repeat in self.__playing[0]:
+            for i in range(repeat):
+                if on > 0:
+                    self.__steps.append((True, on))
+                if off > 0:
+                    self.__steps.append((False, off))
+        self.play_step(self.__generation)
+
+    def play_step(self, generation):
+        with self.__lock:
+            if generation != self.__generation: # silenced meanwhile
+                return
+            self.__task = None
+            if not self.__steps:
+                self.sound(False)
+                self.play_next()
+                return
+            on, seconds = self.__steps.popleft()
+            self.sound(on, self.__playing[1])
+            self.__task = scheduler.after(seconds, self.play_step, args = (generation,), name = 'buzzer')
+
+    def sound(self, on, tone = None):
+        if on and tone:
+            if self.__pwm is None:
+                self.__pwm = GPIO.PWM(self.__pin, tone)
+            else:
+                self.__pwm.ChangeFrequency(tone)
+            self.__pwm.start(50)
+            self.__tone = tone
+            self.__toning = True
+            bank.forget(self.__pin)
+            self.__is_on = True
+            return
+        if self.__toning:
+            self.__pwm.stop()
+            self.__toning = False
+            # the soft PWM thread may still write the pin until its cycle ends, write it again after that
+            scheduler.after(2.0 / self.__tone, self.settle, name = 'buzzer')
+        if on:
+            self.on()
+        else:
+            self.off()
+
+    def settle(self):
+        with self.__lock:
+            if not self.__toning:
+                bank.forget(self.__pin)
+                bank.output(self.__pin, self.__real_true if self.__is_on else not self.__real_true)
+
     #functions.
     def beep(self, seconds):
         '''
-        Beep one time
+        Beep one time, returns at once
         :param seconds: beep time
         :return: void
         '''
-        self.on()
-        time.sleep(seconds)
-        self.off()
+        self.play((seconds, 0, 1), coalesce = False)
 
     def beepAction(self, secs, sleepsecs, times):
         '''
-        Beep in a rhythm
+        Beep in a rhythm, returns at once
         e.g. beepAction(0.02,0.02,30)
         :param secs: beep time
         :param sleepsecs: break time
         :param times: repeat times
         :return: void
         '''
-        for i in range(times):
-            self.beep(secs)
-            time.sleep(sleepsecs)
+        self.play((secs, sleepsecs, times), coalesce = False)
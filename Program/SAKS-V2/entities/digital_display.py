@@ -16,20 +16,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import RPi.GPIO as GPIO
-import time
-import re
-from threading import Thread
+from .gpio import GPIO
+from .pinbank import bank
+from threading import Lock
+from . import glyphs
+from .scheduler import scheduler
 
 class DigitalDisplay(object):
     '''
     Digital display class
     '''
-    __pins = {'seg':[], 'sel':[]}
-    __real_true = GPIO.HIGH
-    __numbers = []
-    __is_flushing = False
-    __number_code = [0x3f, 0x06, 0x5b, 0x4f, 0x66, 0x6d, 0x7d, 0x07, 0x7f, 0x6f, 0x00, 0x40]
+    DIGIT_PERIOD = 0.001 # seconds between the digits, a frame takes 4 of them
+
+    __slots__ = ('__pins', '__real_true', '__shown', '__task', '__digit', '__drawing')
 
     def __init__(self, pins, real_true = GPIO.HIGH):
         '''
@@ -40,12 +39,10 @@ class DigitalDisplay(object):
         '''
         self.__pins = pins
         self.__real_true = real_true
-        try:
-            t1 = Thread(target = self.flush_4bit)
-            t1.setDaemon(True)
-            t1.start()
-        except:
-            print("Error: Unable to start thread by DigitalDisplay")
+        self.__shown = ('', ())
+        self.__task = None
+        self.__digit = 0
+        self.__drawing = Lock()
 
     #Stauts.
     @property
@@ -54,21 +51,22 @@ class DigitalDisplay(object):
         Get the current numbers array showing
         :return: numbers array
         '''
-        return self.__numbers
+        return glyphs.split(self.__shown[0])
+
+    @property
+    def is_on(self):
+        '''
+        Get the current status of the digital display
+        '''
+        return self.__task is not None
 
     #@numbers.setter
     def set_numbers(self, value):
         '''
-        Set the numbers array to show
+        Set the numbers array to show, the refresh picks it up from its next digit
         :return: void
         '''
-        pattern = re.compile(r'[-|#|\d]\.?')
-        matches = pattern.findall(value)
-        #del self.__numbers
-        self.__numbers = []
-        for i in range(len(matches)):
-            self.__numbers.append(matches[i])
-        #print(self.__numbers)
+        self.__shown = (value, glyphs.compile_frame(value))
 
     #@numbers.deleter
     #def numbers(self):
@@ -77,62 +75,45 @@ class DigitalDisplay(object):
     #Verbs.
     def on(self):
         '''
-        Set display on
+        Set display on, the scheduler lights a digit every DIGIT_PERIOD
         :return: void
         '''
-        self.__is_flushing = True
+        with self.__drawing:
+            if self.__task is None:
+                self.__task = scheduler.every(self.DIGIT_PERIOD, self.flush_digit, name = 'digital_display')
 
     def off(self):
         '''
         Set display off
         :return: void
         '''
-        self.__is_flushing = False
-        for p in self.__pins['sel'] + self.__pins['seg']:
-            GPIO.output(p, not self.__real_true)
+        with self.__drawing:
+            if self.__task is not None:
+                self.__task.cancel()
+                self.__task = None
+            bank.output_many(self.__pins['sel'] + self.__pins['seg'], not self.__real_true)
 
     def show(self, str):
         '''
         Set the numbers array to show and enable the display
         :return: void
         '''
-        self.__is_flushing = False
         self.set_numbers(str)
-        self.__is_flushing = True
-        #print(self.__numbers)
-
-
-    def flush_bit(self, sel, num, dp):
-        if num == '#':
-            num = 10
-        elif num == '-':
-            num = 11
-        else:
-            num = int(num)
-
-        GPIO.output(self.__pins['sel'][sel], self.__real_true)
-        n = self.__number_code[num]
-
-        if dp:
-            n = n | 10000000
-
-        for i in range(8):
-            if (n & (1 << i)):
-                GPIO.output(self.__pins['seg'][i], self.__real_true)
-
-        GPIO.output(self.__pins['sel'][sel], not self.__real_true)
-
-        for i in self.__pins['seg']:
-            GPIO.output(i, not self.__real_true)
-
-    def flush_4bit(self):
-        while True:
-            if self.__is_flushing:
-                #print(self.__numbers)
-                #print(range(min(4, len(self.__numbers))))
-                try:
-                    for i in range(min(4, len(self.__numbers))):
-                        self.flush_bit(i, self.__numbers[i].replace('.',''), True if self.__numbers[i].count('.') > 0 else False)
-                        time.sleep(0.001)
-                except:
-                    pass
+        self.on()
+
+    def flush_bit(self, sel, n):
+        bank.output(self.__pins['sel'][sel], self.__real_true)
+
+        bank.output_many([self.__pins['seg'][i] for i in range(8) if n & (1 << i)], self.__real_true)
+
+        bank.output(self.__pins['sel'][sel], not self.__real_true)
+
+        bank.output_many(self.__pins['seg'], not self.__real_true)
+
+    def flush_digit(self):
+        with self.__drawing:
+            frame = self.__shown[1]
+            if self.__task is None or not frame:
+                return
+            self.__digit = (self.__digit + 1) % len(frame)
+            self.flush_bit(self.__digit, frame[self.__digit])
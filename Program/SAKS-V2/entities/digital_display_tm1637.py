@@ -16,22 +16,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import RPi.GPIO as GPIO
-import re
+from .gpio import GPIO
 from .ic_tm1637 import IC_TM1637 as IC_TM1637
+from . import glyphs
 
 class DigitalDisplayTM1637(object):
     '''
     Digital display class
     '''
+    __address_code = (0xc0, 0xc1, 0xc2, 0xc3)
 
-    __ic_tm1637 = None
-    __pattern = None
-    __numbers = []
-    __number_code = [0x3f, 0x06, 0x5b, 0x4f, 0x66, 0x6d, 0x7d, 0x07, 0x7f, 0x6f, 0x00, 0x40, 0x48, 0x39]
-    __address_code = [0xc0, 0xc1, 0xc2, 0xc3]
-    __is_on = False
-
+    __slots__ = ('__ic_tm1637', '__numbers', '__is_on', '__brightness', '__control', '__string', '__shown',
+        '__frames_sent', '__frames_elided')
 
     def __init__(self, pins, real_true = GPIO.HIGH):
         '''
@@ -41,7 +37,14 @@ class DigitalDisplayTM1637(object):
         :return: void
         '''
         self.__ic_tm1637 = IC_TM1637(pins, real_true)
-        self.__pattern = re.compile(r'[ |\-|=|C|\d]\.?')
+        self.__numbers = ''
+        self.__is_on = False
+        self.__brightness = 7
+        self.__control = None
+        self.__string = None
+        self.__shown = [None, None, None, None]
+        self.__frames_sent = 0
+        self.__frames_elided = 0
 
     #Stauts.
     @property
@@ -51,13 +54,37 @@ class DigitalDisplayTM1637(object):
         '''
         return self.__is_on
 
+    @property
+    def brightness(self):
+        '''
+        Get the brightness of the digital display
+        :return: 0 to 7
+        '''
+        return self.__brightness
+
+    @property
+    def frames_sent(self):
+        '''
+        Get the number of show() calls that wrote digits to the chip
+        :return: count
+        '''
+        return self.__frames_sent
+
+    @property
+    def frames_elided(self):
+        '''
+        Get the number of show() calls skipped as the chip showed the frame already
+        :return: count
+        '''
+        return self.__frames_elided
+
     @property
     def numbers(self):
         '''
         Get the current numbers array showing
         :return: numbers array
         '''
-        return self.__numbers
+        return glyphs.split(self.__numbers)
 
     #@numbers.setter
     def set_numbers(self, value):
@@ -65,12 +92,7 @@ class DigitalDisplayTM1637(object):
         Set the numbers array to show
         :return: void
         '''
-        matches = self.__pattern.findall(value)
-        #del self.__numbers
-        self.__numbers = []
-        for i in range(len(matches)):
-            self.__numbers.append(matches[i])
-        #print(self.__numbers)
+        self.__numbers = value
 
     #@numbers.deleter
     #def numbers(self):
@@ -85,12 +107,22 @@ class DigitalDisplayTM1637(object):
         return  self.__ic_tm1637
 
     #Verbs.
+    def set_control(self, command):
+        '''
+        Send the display control command, unless the chip has it already
+        :param command: display control command
+        :return: void
+        '''
+        if command != self.__control:
+            self.__ic_tm1637.set_command(command)
+            self.__control = command
+
     def on(self):
         '''
         Set display on
         :return: void
         '''
-        self.__ic_tm1637.set_command(0x8f)
+        self.set_control(0x88 | self.__brightness)
         self.__is_on = True
 
     def off(self):
@@ -99,35 +131,38 @@ class DigitalDisplayTM1637(object):
         :return: void
         '''
         self.__ic_tm1637.clear()
+        self.__control = 0x80
         self.__is_on = False
 
+    def set_brightness(self, brightness):
+        '''
+        Set the brightness of the digital display
+        :param brightness: 0 to 7
+        :return: void
+        '''
+        self.__brightness = brightness & 0x07
+        if self.__is_on:
+            self.on()
+
     def show(self, str):
         '''
-        Set the numbers array to show and enable the display
+        Set the numbers array to show and enable the display,
+        only the digits that differ from what the chip shows are sent
         :return: void
         '''
+        if str == self.__string:
+            self.__frames_elided += 1
+            self.on()
+            return
         self.set_numbers(str)
-        #print(self.__numbers)
-
-        self.__ic_tm1637.set_command(0x44)
-
-        for i in range(min(4, len(self.__numbers))):
-            dp = True if self.__numbers[i].count('.') > 0 else False
-            num = self.__numbers[i].replace('.','')
-            if num == ' ':
-                num = 10
-            elif num == '-':
-                num = 11
-            elif num == '=':
-                num = 12
-            elif num == 'C':
-                num = 13
-            else:
-                num = int(num)
-
-            if dp:
-                self.__ic_tm1637.set_data(self.__address_code[i], self.__number_code[num]|0x80)
-            else:
-                self.__ic_tm1637.set_data(self.__address_code[i], self.__number_code[num])
-
+        frame = glyphs.compile_frame(str)
+        changed = [i for i in range(len(frame)) if frame[i] != self.__shown[i]]
+        if changed:
+            first, last = changed[0], changed[-1]
+            self.__ic_tm1637.set_frame(self.__address_code[first], frame[first:last + 1])
+            self.__shown[first:last + 1] = frame[first:last + 1]
+            self.__frames_sent += 1
+        else:
+            self.__frames_elided += 1
+        self.__string = str
         self.on()
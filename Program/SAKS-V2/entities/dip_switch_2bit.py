@@ -16,19 +16,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import RPi.GPIO as GPIO
-import time
-from threading import Thread
+from .gpio import GPIO
+from .scheduler import scheduler
 
 class DipSwitch2Bit(object):
     '''
     Dip switch (2bit) class
     '''
-    __pins = []
-    __real_true = GPIO.HIGH
-    __status = []
-
-    __observers = []
+    __slots__ = ('__pins', '__real_true', '__status', '__observers', '__watch_task')
 
     def __init__(self, pins, real_true = GPIO.HIGH):
         '''
@@ -39,8 +34,9 @@ class DipSwitch2Bit(object):
         '''
         self.__pins = pins
         self.__real_true = real_true
-        for p in pins:
-            self.__status.append(not real_true)
+        self.__status = [not real_true for p in pins]
+        self.__observers = []
+        self.__watch_task = None
 
         if self.__real_true:
             self.__status[0] = GPIO.input(self.__pins[0])
@@ -53,13 +49,6 @@ class DipSwitch2Bit(object):
         GPIO.add_event_detect(self.__pins[0], GPIO.BOTH, callback = self.make_event, bouncetime = 50)
         GPIO.add_event_detect(self.__pins[1], GPIO.BOTH, callback = self.make_event, bouncetime = 50)
 
-        try:
-            t1 = Thread(target = self.watching)
-            t1.setDaemon(True)
-            #t1.start()
-        except:
-            print("Error: Unable to start thread by DipSwitch")
-
     #Stauts.
     @property
     def is_on(self):
@@ -104,26 +93,20 @@ class DipSwitch2Bit(object):
                 self.__status[1] = not GPIO.input(self.__pins[1])
                 self.status_changed()
 
-    def watching(self):
-        if self.__real_true:
-            while True:
-                if GPIO.input(self.__pins[0]) != self.__status[0]:
-                    self.__status[0] = GPIO.input(self.__pins[0])
-                    self.status_changed()
-
-                if GPIO.input(self.__pins[1]) != self.__status[1]:
-                    self.__status[1] = GPIO.input(self.__pins[1])
-                    self.status_changed()
-
-                time.sleep(0.05)
-        else:
-            while True:
-                if GPIO.input(self.__pins[0]) == self.__status[0]:
-                    self.__status[0] = not GPIO.input(self.__pins[0])
-                    self.status_changed()
-
-                if GPIO.input(self.__pins[1]) == self.__status[1]:
-                    self.__status[1] = not GPIO.input(self.__pins[1])
-                    self.status_changed()
+    def watch(self, period = 0.05):
+        '''
+        Also poll the switches, for when the edge events are missed
+        :param period: seconds between the polls
+        :return: void
+        '''
+        self.unwatch()
+        self.__watch_task = scheduler.every(period, self.make_event, args = (None,), name = 'dip_switch_watch')
 
-                time.sleep(0.05)
+    def unwatch(self):
+        '''
+        Stop polling the switches
+        :return: void
+        '''
+        if self.__watch_task is not None:
+            self.__watch_task.cancel()
+            self.__watch_task = None
@@ -17,17 +17,54 @@
 # limitations under the License.
 
 import time
-import subprocess
 import os
 import glob
+from threading import Thread, Event, Lock, current_thread
+from . import gpio
+
+W1_BUS_DIR = '/sys/bus/w1'
+_w1_lock = Lock()
+_w1_loaded = False
+
+def load_w1_modules():
+    '''
+    Load the 1-Wire kernel modules unless they are there already, once per process.
+    Called on the first look for sensors rather than at start up, modprobe takes a while
+    :return: void
+    '''
+    global _w1_loaded
+    with _w1_lock:
+        if _w1_loaded:
+            return
+        _w1_loaded = True
+        if gpio.BACKEND == 'rpi' and not os.path.isdir(W1_BUS_DIR):
+            os.system('sudo modprobe w1-gpio')
+            os.system('sudo modprobe w1-therm')
+
+def parse_w1_slave(text):
+    '''
+    Parse the w1_slave file of a sensor
+    :param text: contents of the file
+    :return: Celsius temperature, None if the crc failed or there is no reading
+    '''
+    lines = text.split('\n')
+    if len(lines) < 2 or lines[0].strip()[-3:] != 'YES':
+        return None
+    equals_pos = lines[1].find('t=')
+    if equals_pos == -1:
+        return None
+    return float(lines[1][equals_pos+2:]) / 1000.0
 
 class DS18B20(object):
     '''
     DS18B20 class
     '''
-    __pin = 0 #it's no use
-    #__device_file = ''
-    #__temperature = -128
+    PERIOD = 10.0       # seconds between the readings of the sampler
+    RETRIES = 3         # reads of a w1_slave that failed its crc before giving up
+    RETRY_DELAY = 0.2   # seconds between them
+    ERROR = -128.0
+
+    __slots__ = ('__pins', '__devices', '__reading', '__running', '__stop', '__thread')
 
     def __init__(self, pin = 4):
         '''
@@ -36,49 +73,100 @@ class DS18B20(object):
         :return: void
         '''
         self.__pins = pin
-        os.system('sudo modprobe w1-gpio')
-        os.system('sudo modprobe w1-therm')
+        self.__devices = None
+        self.__reading = (None, None)
+        self.__running = False
+        self.__stop = Event()
+        self.__thread = None
 
     #Verbs.
+    def devices(self, refresh = False):
+        '''
+        Get the device folders of the sensors, found once and cached
+        :param refresh: look for the sensors again
+        :return: device folders array
+        '''
+        if self.__devices is None or refresh:
+            load_w1_modules()
+            self.__devices = sorted(glob.glob(gpio.W1_DEVICES_DIR + '28*'))
+        return self.__devices
+
     def get_device_file(self, index = 0):
-        base_dir = '/sys/bus/w1/devices/'
+        devices = self.devices()
         #fix "IndexError: list index out of range"
-        if not glob.glob(base_dir + '28*'):
-            return False
-        if glob.glob(base_dir + '28*')[index] is not None:
-            device_folder = glob.glob(base_dir + '28*')[index]
-            return device_folder + '/w1_slave'
-        else:
+        if index >= len(devices):
             return False
+        return devices[index] + '/w1_slave'
 
     def read_temp_raw(self, index = 0):
         df = self.get_device_file(index)
         if not df:
             return False
-        catdata = subprocess.Popen(['cat', df], stdout = subprocess.PIPE, stderr = subprocess.PIPE)
-        out,err = catdata.communicate()
-        out_decode = out.decode('utf-8')
-        lines = out_decode.split('\n')
-        return lines
+        try:
+            with open(df) as f:
+                return f.read().split('\n')
+        except (IOError, OSError):
+            # unplugged, or the sensors changed
+            self.devices(True)
+            return False
 
     def read_temp(self, index = 0):
-        tr = self.read_temp_raw(index)
-        if not tr:
-            return False
-        lines = tr
-        while lines[0].strip()[-3:] != 'YES':
-            time.sleep(0.2)
-            tr = self.read_temp_raw(index)
-            if not tr:
+        '''
+        Read the temperature, retrying a bounded number of times while the crc fails
+        :param index: from 0 to n
+        :return: Celsius temperature, False on failure
+        '''
+        for i in range(self.RETRIES):
+            if i:
+                time.sleep(self.RETRY_DELAY)
+            lines = self.read_temp_raw(index)
+            if not lines:
                 return False
-            lines = tr
-        equals_pos = lines[1].find('t=')
-        if equals_pos != -1:
-            temp_string = lines[1][equals_pos+2:]
-            temp_c = float(temp_string) / 1000.0
-            temp_f = temp_c * 9.0 / 5.0 + 32.0
-            #return temp_c, temp_f
-            return temp_c
+            temp_c = parse_w1_slave('\n'.join(lines))
+            if temp_c is not None:
+                if index == 0:
+                    self.__reading = (temp_c, time.time())
+                return temp_c
+        return False
+
+    def start(self, period = PERIOD):
+        '''
+        Start the sampler, a thread reading the first sensor every period
+        :param period: seconds between the readings
+        :return: void
+        '''
+        if self.__running:
+            return
+        self.__running = True
+        self.__stop.clear()
+        try:
+            t1 = Thread(target = self.sampling, args = (period,))
+            t1.setDaemon(True)
+            t1.start()
+            self.__thread = t1
+        except:
+            self.__running = False
+            print("Error: Unable to start thread by DS18B20")
+
+    def stop(self):
+        '''
+        Stop the sampler, and wait for its reading to end
+        :return: void
+        '''
+        self.__running = False
+        self.__stop.set()
+        thread, self.__thread = self.__thread, None
+        if thread is not None and thread is not current_thread():
+            thread.join(self.RETRIES * (self.RETRY_DELAY + 1.0))
+
+    def sampling(self, period):
+        while self.__running:
+            try:
+                self.read_temp()
+            except Exception as e:
+                # a bad read must not end the sampler, reading tells how old the last good one is
+                print("Error: Reading DS18B20 failed: %s" % e)
+            self.__stop.wait(period)
 
     #Stauts.
     @property
@@ -88,20 +176,131 @@ class DS18B20(object):
         :param index: from 0 to n
         :return: Return true if the ds18b20 is exist
         '''
-        #if not os.path.exists(self.__device_file):
-        #    return False
-        #else:
-        #    return True
         return self.get_device_file(index)
 
+    @property
+    def reading(self):
+        '''
+        Get the latest temperature of the first sensor without waiting
+        :return: (Celsius temperature, age in seconds), (None, None) if never read
+        '''
+        value, t = self.__reading
+        if t is None:
+            return None, None
+        return value, time.time() - t
+
     @property
     def temperature(self, index = 0):
         '''
-        Get the temperature from ds18b20
+        Get the temperature from ds18b20, the latest reading if the sampler runs
         :param index: from 0 to n
         :return: Return the temperature from ds18b20, return -128 means get a error.
         '''
+        if index == 0 and self.__running and self.__reading[0] is not None:
+            return self.__reading[0]
         if not self.is_exist:
-            return -128.0
-        else:
-            return self.read_temp(index)
+            return self.ERROR
+        t = self.read_temp(index)
+        return self.ERROR if t is False else t
+
+class DS18B20Bus(object):
+    '''
+    All the DS18B20 on a 1-Wire bus, converting at once where the kernel supports therm_bulk_read
+    '''
+    CONVERSION_TIME = 0.75  # seconds a 12 bit conversion takes
+    POLL = 0.05             # seconds between looks at the bulk conversion
+    RETRIES = 3
+    RETRY_DELAY = 0.2
+
+    __slots__ = ('__master', '__devices')
+
+    def __init__(self, master = 'w1_bus_master1'):
+        '''
+        Init the bus
+        :param master: name of the bus master in the w1 devices folder
+        :return: void
+        '''
+        self.__master = master
+        self.__devices = None
+
+    #Stauts.
+    @property
+    def bulk_file(self):
+        '''
+        Get the therm_bulk_read file of the bus master
+        :return: path, None if the kernel has no bulk conversion
+        '''
+        path = os.path.join(gpio.W1_DEVICES_DIR, self.__master, 'therm_bulk_read')
+        return path if os.path.exists(path) else None
+
+    #Verbs.
+    def devices(self, refresh = False):
+        '''
+        Get the sensors, found once and cached
+        :param refresh: look for the sensors again
+        :return: dict of the device folders by sensor id
+        '''
+        if self.__devices is None or refresh:
+            load_w1_modules()
+            self.__devices = {}
+            for folder in glob.glob(gpio.W1_DEVICES_DIR + '28*'):
+                self.__devices[os.path.basename(folder)] = folder
+        return self.__devices
+
+    def convert(self):
+        '''
+        Start a conversion on all the sensors at once and wait for it
+        :return: True when converted, False if the bus can't or it timed out
+        '''
+        path = self.bulk_file
+        if path is None:
+            return False
+        try:
+            with open(path, 'w') as f:
+                f.write('trigger\n')
+            deadline = time.time() + 2 * self.CONVERSION_TIME
+            while True:
+                with open(path) as f:
+                    status = f.read().strip()
+                if status != '-1': # -1 while converting
+                    return True
+                if time.time() > deadline:
+                    return False
+                time.sleep(self.POLL)
+        except (IOError, OSError):
+            return False
+
+    def read(self, device_id):
+        '''
+        Read a sensor, with a bounded number of retries while the crc fails
+        :param device_id: sensor id, e.g. '28-000000000001'
+        :return: Celsius temperature, None on failure
+        '''
+        folder = self.devices().get(device_id)
+        if folder is None:
+            return None
+        for i in range(self.RETRIES):
+            if i:
+                time.sleep(self.RETRY_DELAY)
+            try:
+                with open(folder + '/w1_slave') as f:
+                    t = parse_w1_slave(f.read())
+            except (IOError, OSError):
+                return None
+            if t is not None:
+                return t
+        return None
+
+    def read_all(self):
+        '''
+        Read all the sensors in one pass, after a bulk conversion where there is one,
+        else each read converts in turn
+        :return: dict of Celsius temperatures by sensor id, None for the failed ones
+        '''
+        self.convert()
+        r = {}
+        for device_id in self.devices():
+            r[device_id] = self.read(device_id)
+        if None in r.values():
+            self.devices(True)
+        return r
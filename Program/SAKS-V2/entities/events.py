@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+from collections import deque, namedtuple
+from .scheduler import scheduler
+
+InputEvent = namedtuple('InputEvent', ['time', 'name', 'args'])
+
+class EventQueue(object):
+    '''
+    Input events posted by GPIO callbacks and signal handlers, handled later from the scheduler.
+    Posting only appends to a deque, which is safe anywhere, even in a signal handler
+    '''
+    __slots__ = ('__events', '__handlers', '__task', '__handled', '__dropped', '__latency', '__max_latency')
+
+    def __init__(self, size = 64):
+        '''
+        Init the queue
+        :param size: most events waiting, the oldest are dropped beyond it
+        :return: void
+        '''
+        self.__events = deque(maxlen = size)
+        self.__handlers = {}
+        self.__task = None
+        self.__handled = 0
+        self.__dropped = 0
+        self.__latency = None
+        self.__max_latency = 0.0
+
+    #Stauts.
+    @property
+    def pending(self):
+        '''
+        Get the number of events waiting
+        :return: count
+        '''
+        return len(self.__events)
+
+    @property
+    def handled(self):
+        return self.__handled
+
+    @property
+    def dropped(self):
+        return self.__dropped
+
+    @property
+    def latency(self):
+        '''
+        Get the time from posting the last event to the end of its handler
+        :return: seconds, None if nothing was handled yet
+        '''
+        return self.__latency
+
+    @property
+    def max_latency(self):
+        '''
+        Get the longest time from posting an event to the end of its handler
+        :return: seconds
+        '''
+        return self.__max_latency
+
+    def report(self):
+        '''
+        Tell how quickly the events were handled
+        :return: string, e.g. '3 handled 0 dropped 1.2ms latest 4.5ms max latency'
+        '''
+        return '%d handled %d dropped %.1fms latest %.1fms max latency' % (self.__handled, self.__dropped,
+            (self.__latency or 0) * 1000, self.__max_latency * 1000)
+
+    #Verbs.
+    def on(self, name, handler):
+        '''
+        Set the handler of an event
+        :param name: event name
+        :param handler: function called with the time the event was posted, then the event arguments
+        :return: void
+        '''
+        self.__handlers[name] = handler
+
+    def post(self, name, *args):
+        '''
+        Queue an event and return at once
+        :param name: event name
+        :param args: arguments for the handler
+        :return: void
+        '''
+        if len(self.__events) == self.__events.maxlen:
+            self.__dropped += 1
+        self.__events.append(InputEvent(time.time(), name, args))
+
+    def poster(self, name):
+        '''
+        Make a callback posting an event, for GPIO.add_event_detect or signal.signal.
+        The arguments it is called with, a channel or a signal and a frame, are not kept
+        :param name: event name
+        :return: function
+        '''
+        def post(*args):
+            self.post(name)
+        return post
+
+    def start(self, period = 0.02):
+        '''
+        Handle the events from the scheduler
+        :param period: seconds between the looks at the queue, the latency is about that at worst
+        :return: void
+        '''
+        if self.__task is None:
+            self.__task = scheduler.every(period, self.dispatch, name = 'events')
+
+    def stop(self):
+        '''
+        Stop handling the events, the ones waiting stay queued
+        :return: void
+        '''
+        if self.__task is not None:
+            self.__task.cancel()
+            self.__task = None
+
+    def dispatch(self):
+        while self.__events:
+            event = self.__events.popleft()
+            handler = self.__handlers.get(event.name)
+            if handler is None:
+                continue
+            try:
+                handler(event.time, *event.args)
+            except Exception as e:
+                print("Error: Handling %s failed: %s" % (event.name, e))
+            self.__latency = time.time() - event.time
+            self.__max_latency = max(self.__max_latency, self.__latency)
+            self.__handled += 1
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+from threading import Lock
+
+# segment bits: 0x01 a, 0x02 b, 0x04 c, 0x08 d, 0x10 e, 0x20 f, 0x40 g, 0x80 dp
+GLYPHS = {
+    '0': 0x3f, '1': 0x06, '2': 0x5b, '3': 0x4f, '4': 0x66,
+    '5': 0x6d, '6': 0x7d, '7': 0x07, '8': 0x7f, '9': 0x6f,
+    'A': 0x77, 'B': 0x7c, 'C': 0x39, 'D': 0x5e, 'E': 0x79, 'F': 0x71,
+    'a': 0x77, 'b': 0x7c, 'c': 0x39, 'd': 0x5e, 'e': 0x79, 'f': 0x71,
+    '-': 0x40, '_': 0x08, '=': 0x48, ' ': 0x00, '#': 0x00,
+}
+DP = 0x80
+
+class FrameCompiler(object):
+    '''
+    Compiles display strings to frames, tuples of segment bytes, with an LRU cache of the recent strings
+    '''
+    __slots__ = ('__digits', '__size', '__cache', '__hits', '__misses', '__lock')
+
+    def __init__(self, digits = 4, size = 64):
+        '''
+        Init the compiler
+        :param digits: bytes per frame
+        :param size: number of strings cached
+        :return: void
+        '''
+        self.__digits = digits
+        self.__size = size
+        self.__cache = OrderedDict()
+        self.__hits = 0
+        self.__misses = 0
+        self.__lock = Lock()
+
+    #Stauts.
+    @property
+    def hits(self):
+        '''
+        Get the number of compiles served from the cache
+        :return: count
+        '''
+        return self.__hits
+
+    @property
+    def misses(self):
+        '''
+        Get the number of compiles that parsed the string
+        :return: count
+        '''
+        return self.__misses
+
+    #Verbs.
+    def split(self, value):
+        '''
+        Split a display string to glyphs, each with its decimal point if any,
+        characters without a glyph are skipped
+        :param value: string, e.g. '12.34'
+        :return: glyphs array, e.g. ['1', '2.', '3', '4']
+        '''
+        glyphs = []
+        for c in value:
+            if c == '.' and glyphs and not glyphs[-1].endswith('.'):
+                glyphs[-1] += '.'
+            elif c in GLYPHS:
+                glyphs.append(c)
+        return glyphs
+
+    def parse(self, value):
+        '''
+        Compile a display string without the cache, missing digits are blank
+        :param value: string
+        :return: frame
+        '''
+        frame = []
+        for g in self.split(value)[:self.__digits]:
+            frame.append(GLYPHS[g[0]] | (DP if len(g) > 1 else 0))
+        frame += [0] * (self.__digits - len(frame))
+        return tuple(frame)
+
+    def compile(self, value):
+        '''
+        Compile a display string
+        :param value: string
+        :return: frame
+        '''
+        with self.__lock:
+            frame = self.__cache.pop(value, None)
+            if frame is None:
+                self.__misses += 1
+                frame = self.parse(value)
+                if len(self.__cache) >= self.__size:
+                    self.__cache.popitem(last = False)
+            else:
+                self.__hits += 1
+            self.__cache[value] = frame
+        return frame
+
+compiler = FrameCompiler()
+compile_frame = compiler.compile
+split = compiler.split
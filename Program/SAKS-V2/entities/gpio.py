@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+GPIO backend for the entities and the programs using them.
+
+RPi.GPIO is used where it can be imported, i.e. on the Pi, anywhere else a
+simulated board stands in for it. Set SAKS_GPIO to 'rpi' or 'sim' to choose,
+and SAKS_SIM_BOARD to the layout of the simulated board ('saks-v2' by default,
+see gpio_sim.LAYOUTS).
+
+    from entities.gpio import GPIO
+'''
+
+import os
+import sys
+
+BACKEND = None
+GPIO = None
+board = None
+W1_DEVICES_DIR = '/sys/bus/w1/devices/'
+
+def load_backend(name, layout = None):
+    '''
+    Load a GPIO backend, only meant to be called once before the entities are used
+    :param name: 'rpi' or 'sim'
+    :param layout: layout of the simulated board
+    :return: the GPIO module or object
+    '''
+    global BACKEND, GPIO, board, W1_DEVICES_DIR
+    if name == 'rpi':
+        import RPi.GPIO
+        GPIO = RPi.GPIO
+        board = None
+        W1_DEVICES_DIR = '/sys/bus/w1/devices/'
+    elif name == 'sim':
+        from .gpio_sim import SimulatedBoard
+        board = SimulatedBoard(layout or os.environ.get('SAKS_SIM_BOARD', 'saks-v2'))
+        GPIO = board
+        W1_DEVICES_DIR = board.w1_devices_dir
+    else:
+        raise ValueError('Unknown GPIO backend: %s' % name)
+    BACKEND = name
+    return GPIO
+
+if os.environ.get('SAKS_GPIO'):
+    load_backend(os.environ['SAKS_GPIO'])
+else:
+    try:
+        load_backend('rpi')
+    except (ImportError, RuntimeError):
+        sys.stderr.write('RPi.GPIO is not available, using a simulated board\n')
+        load_backend('sim')
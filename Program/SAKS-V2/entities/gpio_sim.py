@@ -0,0 +1,555 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+Simulated board with the RPi.GPIO interface, for running and profiling the
+programs off the Pi. Besides plain pin levels it models the devices wired to
+the SAKS HAT: the HC-SR04 echo timing, the TM1637 and 74HC595 registers,
+the tact and dip switches and the 1-Wire sysfs tree of the DS18B20.
+
+    board = SimulatedBoard('saks-v2')
+    board.sonar.distance = 45
+    board.press(16)
+    print(board.tm1637.registers, board.calls['output'])
+
+board.spi() stands in for spidev.SpiDev, feeding the 74HC595 shift register.
+'''
+
+import os
+import time
+import heapq
+import atexit
+import shutil
+import tempfile
+import threading
+from collections import Counter
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+class SonarModel(object):
+    '''
+    HC-SR04, the echo goes high a while after the trigger falls and stays high
+    for the time sound needs to travel to the object and back
+    '''
+    RISE_DELAY = 0.0005
+    NO_ECHO_PULSE = 0.038
+
+    def __init__(self, board, trig, echo, distance = 60, sound_speed = 34300):
+        self.board = board
+        self.trig = trig
+        self.echo = echo
+        self.distance = distance # cm, None for nothing in front of the sensor
+        self.sound_speed = sound_speed
+        self.pings = 0
+        self.__trig = 0
+        self.__rise = self.__fall = 0.0
+
+    def on_output(self, pin, level, now):
+        falling = self.__trig and not level
+        self.__trig = level
+        if falling and now >= self.__fall:
+            self.pings += 1
+            d = self.distance
+            width = self.NO_ECHO_PULSE if d is None else 2.0 * d / self.sound_speed
+            self.__rise = now + self.RISE_DELAY
+            self.__fall = self.__rise + width
+            self.board.later(self.echo, ((self.__rise, 1), (self.__fall, 0)))
+
+    def level(self, pin, now):
+        return 1 if self.__rise <= now < self.__fall else 0
+
+class TM1637Model(object):
+    '''
+    TM1637, decodes the two-wire bus into the display registers
+    '''
+    def __init__(self, board, clk, di, digits = 6):
+        self.clk = clk
+        self.di = di
+        self.registers = [0] * digits
+        self.display_on = False
+        self.brightness = 0
+        self.auto_increment = True
+        self.transactions = 0
+        self.__clk = self.__di = 0
+        self.__active = False
+        self.__bytes = []
+        self.__byte = self.__nbits = 0
+
+    def on_output(self, pin, level, now):
+        if pin == self.clk:
+            if level and not self.__clk and self.__active:
+                if self.__nbits < 8:
+                    self.__byte |= self.__di << self.__nbits
+                    self.__nbits += 1
+                else: # ack clock
+                    self.__bytes.append(self.__byte)
+                    self.__byte = self.__nbits = 0
+            self.__clk = level
+        else:
+            if self.__clk and level != self.__di:
+                if self.__active:
+                    self.execute(self.__bytes)
+                self.__active = not level # falling is start, rising is stop
+                self.__bytes = []
+                self.__byte = self.__nbits = 0
+            self.__di = level
+
+    def execute(self, data):
+        if not data:
+            return
+        self.transactions += 1
+        command = data[0]
+        if command & 0xc0 == 0x40:
+            self.auto_increment = not command & 0x04
+        elif command & 0xc0 == 0x80:
+            self.display_on = bool(command & 0x08)
+            self.brightness = command & 0x07
+        elif command & 0xc0 == 0xc0:
+            address = command & 0x07
+            for b in data[1:]:
+                if address < len(self.registers):
+                    self.registers[address] = b
+                if self.auto_increment:
+                    address += 1
+
+class HC595Model(object):
+    '''
+    74HC595 (or a daisy chain of them), shifts on SHCP rising and latches on STCP rising
+    '''
+    def __init__(self, board, ds, shcp, stcp, chain = 1):
+        self.ds = ds
+        self.shcp = shcp
+        self.stcp = stcp
+        self.width = 8 * chain
+        self.shift = 0
+        self.latched = 0
+        self.latches = 0
+        self.__levels = {ds: 0, shcp: 0, stcp: 0}
+
+    @property
+    def outputs(self):
+        '''
+        :return: levels of Q0, Q1, ... of the chain
+        '''
+        return [self.latched >> i & 0x01 for i in range(self.width)]
+
+    def shift_in(self, bit):
+        self.shift = ((self.shift << 1) | bit) & ((1 << self.width) - 1)
+
+    def on_output(self, pin, level, now):
+        rising = level and not self.__levels[pin]
+        self.__levels[pin] = level
+        if rising and pin == self.shcp:
+            self.shift_in(self.__levels[self.ds])
+        elif rising and pin == self.stcp:
+            self.latched = self.shift
+            self.latches += 1
+
+class W1Model(object):
+    '''
+    1-Wire sysfs tree with DS18B20 sensors, in a temporary directory
+    '''
+    def __init__(self):
+        self.root = tempfile.mkdtemp(prefix = 'saks-w1-')
+        self.devices_dir = os.path.join(self.root, 'devices') + os.sep
+        os.mkdir(self.devices_dir)
+        self.temperatures = {}
+        self.bulk_read = None
+
+    def enable_bulk_read(self, master = 'w1_bus_master1'):
+        '''
+        Give the bus master a therm_bulk_read file; writes to it just replace its contents
+        '''
+        os.mkdir(os.path.join(self.devices_dir, master))
+        self.bulk_read = os.path.join(self.devices_dir, master, 'therm_bulk_read')
+        with open(self.bulk_read, 'w') as f:
+            f.write('0\n')
+
+    def add_sensor(self, device_id, temperature = 25.0):
+        os.mkdir(os.path.join(self.devices_dir, device_id))
+        self.set_temperature(device_id, temperature)
+
+    def set_temperature(self, device_id, temperature):
+        self.temperatures[device_id] = temperature
+        raw = '72 01 4b 46 7f ff 0e 10 57'
+        with open(os.path.join(self.devices_dir, device_id, 'w1_slave'), 'w') as f:
+            f.write('%s : crc=57 YES\n%s t=%d\n' % (raw, raw, int(round(temperature * 1000))))
+
+    def remove(self):
+        shutil.rmtree(self.root, True)
+
+LAYOUTS = {
+    'saks-v2': {
+        'sonar': {'trig': 14, 'echo': 15},
+        'tm1637': {'clk': 5, 'di': 25},
+        'hc595': {'ds': 6, 'shcp': 19, 'stcp': 13},
+        'switches': [16, 20, 21, 26],
+        'w1': ['28-000000000001'],
+    },
+    'saks-v1': {
+        'sonar': {'trig': 15, 'echo': 14},
+        'switches': [18, 23],
+        'w1': ['28-000000000001'],
+    },
+}
+
+class SimulatedBoard(object):
+    '''
+    Simulated board, a drop-in for the RPi.GPIO module
+    '''
+    BCM = 11
+    BOARD = 10
+    OUT = 0
+    IN = 1
+    LOW = 0
+    HIGH = 1
+    PUD_OFF = 20
+    PUD_DOWN = 21
+    PUD_UP = 22
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+    VERSION = 'sim'
+    RPI_INFO = {'TYPE': 'Simulated', 'P1_REVISION': 3}
+
+    def __init__(self, layout = 'saks-v2'):
+        '''
+        Init the board
+        :param layout: key of LAYOUTS, tells which devices are on which pins
+        :return: void
+        '''
+        self.calls = Counter()
+        self.__mode = None
+        self.__directions = {}
+        self.__levels = {}
+        self.__models = {}
+        self.__inputs = {}
+        self.__detects = {}
+        self.__detected = set()
+        self.__edge = threading.Condition()
+        self.__callbacks = queue.Queue()
+        self.__timeline = [] # heap of (time, count, pin, level), the input edges to come
+        self.__timer = threading.Condition()
+        self.__count = 0
+        self.__running = True
+        self.sonar = self.tm1637 = self.hc595 = None
+        self.w1 = W1Model()
+        self.w1_devices_dir = self.w1.devices_dir
+        atexit.register(self.w1.remove)
+
+        wiring = LAYOUTS[layout]
+        if 'sonar' in wiring:
+            self.sonar = SonarModel(self, **wiring['sonar'])
+            self.attach(self.sonar, [self.sonar.trig], [self.sonar.echo])
+        if 'tm1637' in wiring:
+            self.tm1637 = TM1637Model(self, **wiring['tm1637'])
+            self.attach(self.tm1637, [self.tm1637.clk, self.tm1637.di])
+        if 'hc595' in wiring:
+            self.hc595 = HC595Model(self, **wiring['hc595'])
+            self.attach(self.hc595, [self.hc595.ds, self.hc595.shcp, self.hc595.stcp])
+        self.switches = wiring.get('switches', [])
+        for device_id in wiring.get('w1', []):
+            self.w1.add_sensor(device_id)
+        if wiring.get('w1'):
+            self.w1.enable_bulk_read()
+
+        t1 = threading.Thread(target = self.dispatching)
+        t1.setDaemon(True)
+        t1.start()
+        t2 = threading.Thread(target = self.timing)
+        t2.setDaemon(True)
+        t2.start()
+        self.__threads = (t1, t2)
+        atexit.register(self.stop)
+
+    #Simulation.
+    def attach(self, model, outputs = (), inputs = ()):
+        '''
+        Attach a device model, it gets on_output(pin, level, now) for writes
+        to its outputs and is asked level(pin, now) when its inputs are read
+        :return: void
+        '''
+        for p in outputs:
+            self.__models[p] = model
+        for p in inputs:
+            self.__inputs[p] = model
+
+    def reset_calls(self):
+        '''
+        Reset the GPIO call counters
+        :return: void
+        '''
+        self.calls.clear()
+
+    def set_input(self, pin, level):
+        '''
+        Drive an input pin from outside, e.g. a switch
+        :return: void
+        '''
+        level = 1 if level else 0
+        if self.__levels.get(pin, self.__pull_level(pin)) != level:
+            self.edge(pin, level)
+
+    def press(self, pin):
+        '''
+        Press a tact (or turn on a dip switch), they pull the pin low
+        :return: void
+        '''
+        self.set_input(pin, 0)
+
+    def release(self, pin):
+        self.set_input(pin, 1)
+
+    def later(self, pin, edges):
+        '''
+        Change an input pin at the given times, the timing thread does
+        :param edges: ((time, level), ...)
+        :return: void
+        '''
+        with self.__timer:
+            for at, level in edges:
+                self.__count += 1
+                heapq.heappush(self.__timeline, (at, self.__count, pin, level))
+            self.__timer.notify()
+
+    def stop(self):
+        '''
+        Stop the timing and the callback threads, done at exit so they do not
+        run on while the interpreter shuts down
+        :return: void
+        '''
+        with self.__timer:
+            self.__running = False
+            self.__timer.notify()
+        self.__callbacks.put(None)
+        for t in self.__threads:
+            t.join(1.0)
+
+    def edge(self, pin, level):
+        '''
+        Set an input pin and fire its edge events
+        :return: void
+        '''
+        self.__levels[pin] = level
+        detect = self.__detects.get(pin)
+        if detect is not None:
+            edge, bouncetime, callbacks = detect[:3]
+            if edge == self.BOTH or edge == (self.RISING if level else self.FALLING):
+                now = time.time()
+                if now - detect[3] >= bouncetime / 1000.0:
+                    detect[3] = now
+                    self.__detected.add(pin)
+                    for cb in callbacks:
+                        self.__callbacks.put((cb, pin))
+        with self.__edge:
+            self.__edge.notify_all()
+
+    def timing(self):
+        with self.__timer:
+            while self.__running:
+                if not self.__timeline:
+                    self.__timer.wait()
+                    continue
+                at, count, pin, level = self.__timeline[0]
+                delay = at - time.time()
+                if delay > 0:
+                    self.__timer.wait(delay)
+                    continue
+                heapq.heappop(self.__timeline)
+                self.__timer.release()
+                try:
+                    self.edge(pin, level)
+                finally:
+                    self.__timer.acquire()
+
+    def dispatching(self):
+        while True:
+            item = self.__callbacks.get()
+            if item is None:
+                return
+            cb, pin = item
+            try:
+                cb(pin)
+            except Exception as e:
+                print('Error in GPIO callback: %r' % e)
+
+    def __pull_level(self, pin):
+        return 1 if self.__directions.get(pin) == (self.IN, self.PUD_UP) else 0
+
+    def __check_mode(self):
+        if self.__mode is None:
+            raise RuntimeError('Please set pin numbering mode using GPIO.setmode(GPIO.BOARD) or GPIO.setmode(GPIO.BCM)')
+
+    #RPi.GPIO.
+    def setwarnings(self, flag):
+        self.calls['setwarnings'] += 1
+
+    def setmode(self, mode):
+        self.calls['setmode'] += 1
+        self.__mode = mode
+
+    def getmode(self):
+        return self.__mode
+
+    def setup(self, channel, direction, pull_up_down = PUD_OFF, initial = -1):
+        self.calls['setup'] += 1
+        self.__check_mode()
+        for p in channel if isinstance(channel, (list, tuple)) else [channel]:
+            if direction == self.OUT:
+                self.__directions[p] = (self.OUT, self.PUD_OFF)
+                if initial != -1:
+                    self.output(p, initial)
+            else:
+                self.__directions[p] = (self.IN, pull_up_down)
+                if p not in self.__inputs:
+                    self.__levels[p] = self.__pull_level(p)
+
+    def output(self, channel, value):
+        self.calls['output'] += 1
+        if isinstance(channel, (list, tuple)):
+            values = value if isinstance(value, (list, tuple)) else [value] * len(channel)
+            for p, v in zip(channel, values):
+                self.__output(p, v)
+        else:
+            self.__output(channel, value)
+
+    def __output(self, pin, value):
+        if self.__directions.get(pin, (None,))[0] != self.OUT:
+            raise RuntimeError('The GPIO channel has not been set up as an OUTPUT')
+        level = 1 if value else 0
+        self.__levels[pin] = level
+        model = self.__models.get(pin)
+        if model is not None:
+            model.on_output(pin, level, time.time())
+
+    def input(self, channel):
+        self.calls['input'] += 1
+        self.__check_mode()
+        if channel not in self.__directions:
+            raise RuntimeError('You must setup() the GPIO channel first')
+        model = self.__inputs.get(channel)
+        if model is not None and self.__directions[channel][0] == self.IN:
+            return model.level(channel, time.time())
+        return self.__levels.get(channel, 0)
+
+    def cleanup(self, channel = None):
+        self.calls['cleanup'] += 1
+        pins = list(self.__directions) if channel is None else [channel]
+        for p in pins:
+            self.__directions.pop(p, None)
+            self.__detects.pop(p, None)
+            self.__detected.discard(p)
+
+    def add_event_detect(self, channel, edge, callback = None, bouncetime = 0):
+        self.calls['add_event_detect'] += 1
+        if self.__directions.get(channel, (None,))[0] != self.IN:
+            raise RuntimeError('You must setup() the GPIO channel as an input first')
+        if channel in self.__detects:
+            raise RuntimeError('Conflicting edge detection already enabled for this GPIO channel')
+        self.__detects[channel] = [edge, bouncetime, [callback] if callback else [], 0.0]
+
+    def remove_event_detect(self, channel):
+        self.calls['remove_event_detect'] += 1
+        self.__detects.pop(channel, None)
+        self.__detected.discard(channel)
+
+    def add_event_callback(self, channel, callback):
+        self.calls['add_event_callback'] += 1
+        if channel not in self.__detects:
+            raise RuntimeError('Add event detection using add_event_detect first before adding a callback')
+        self.__detects[channel][2].append(callback)
+
+    def event_detected(self, channel):
+        self.calls['event_detected'] += 1
+        if channel in self.__detected:
+            self.__detected.discard(channel)
+            return True
+        return False
+
+    def wait_for_edge(self, channel, edge, bouncetime = 0, timeout = -1):
+        self.calls['wait_for_edge'] += 1
+        level = self.input(channel)
+        deadline = None if timeout < 0 else time.time() + timeout / 1000.0
+        with self.__edge:
+            while True:
+                now_level = self.__levels.get(channel, level)
+                if now_level != level:
+                    if edge == self.BOTH or edge == (self.RISING if now_level else self.FALLING):
+                        return channel
+                    level = now_level
+                if deadline is None:
+                    self.__edge.wait()
+                else:
+                    left = deadline - time.time()
+                    if left <= 0:
+                        return None
+                    self.__edge.wait(left)
+
+    def gpio_function(self, channel):
+        return self.__directions.get(channel, (self.IN,))[0]
+
+    def PWM(self, channel, frequency):
+        self.calls['PWM'] += 1
+        return SimulatedPWM(self, channel, frequency)
+
+    def spi(self, bus = 0, device = 0):
+        '''
+        Stand-in for spidev.SpiDev, with MOSI and SCLK wired to the DS and SHCP of the 74HC595
+        '''
+        return SimulatedSPI(self, self.hc595)
+
+class SimulatedSPI(object):
+    '''
+    SPI device of the simulated board with the spidev.SpiDev interface, mode 0 and MSB first
+    '''
+    def __init__(self, board, shift_register = None):
+        self.board = board
+        self.shift_register = shift_register
+        self.max_speed_hz = 500000
+        self.mode = 0
+        self.transfers = 0
+
+    def writebytes(self, data):
+        self.board.calls['spi.writebytes'] += 1
+        self.transfers += 1
+        if self.shift_register is not None:
+            for byte in data:
+                for i in range(7, -1, -1):
+                    self.shift_register.shift_in(byte >> i & 0x01)
+
+    def xfer2(self, data):
+        self.writebytes(data)
+        return [0] * len(data)
+
+    def close(self):
+        pass
+
+class SimulatedPWM(object):
+    '''
+    Software PWM of the simulated board, keeps its settings only
+    '''
+    def __init__(self, board, channel, frequency):
+        self.board = board
+        self.channel = channel
+        self.frequency = frequency
+        self.duty_cycle = 0
+        self.running = False
+
+    def start(self, duty_cycle):
+        self.board.calls['PWM.start'] += 1
+        self.duty_cycle = duty_cycle
+        self.running = True
+
+    def stop(self):
+        self.board.calls['PWM.stop'] += 1
+        self.running = False
+
+    def ChangeDutyCycle(self, duty_cycle):
+        self.board.calls['PWM.ChangeDutyCycle'] += 1
+        self.duty_cycle = duty_cycle
+
+    def ChangeFrequency(self, frequency):
+        self.board.calls['PWM.ChangeFrequency'] += 1
+        self.frequency = frequency
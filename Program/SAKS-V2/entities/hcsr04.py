@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from .gpio import GPIO
+from .pinbank import bank
+import time
+from threading import Event
+
+def speed_of_sound(celsius):
+    '''
+    Speed of sound in dry air
+    :param celsius: air temperature
+    :return: cm/s
+    '''
+    return 33130 + 60.6 * celsius
+
+class HCSR04(object):
+    '''
+    HC-SR04 ultrasonic ranging module class
+    '''
+    MODE_EDGE = 'edge'
+    MODE_POLL = 'poll'
+    MAX_RANGE = 400         # cm, what the sensor can see at best
+    TRIGGER_PULSE = 0.00001 # the sensor wants 10us
+    RISE_TIMEOUT = 0.002    # echo goes high about 0.5ms after the trigger
+    WAIT_SLICE = 0.0002     # sleep between looks at the echo edges
+    BURST_TOLERANCE = 2     # cm, readings this close to the median agree with it
+
+    __slots__ = ('__pins', '__mode', '__max_range', '__calibration', '__pings', '__timeouts', '__edges', '__echo_done',
+        '__window')
+
+    def __init__(self, pins, mode = MODE_EDGE, sound_speed = 34300, max_range = MAX_RANGE, window = 9):
+        '''
+        Init the HC-SR04
+        :param pins: pin numbers in dict, {'trig': trigger pin, 'echo': echo pin}
+        :param mode: HCSR04.MODE_EDGE or HCSR04.MODE_POLL
+        :param sound_speed: speed of sound in cm/s
+        :param max_range: farthest distance in cm worth waiting for
+        :param window: most pings in a burst
+        :return: void
+        '''
+        self.__pins = pins
+        self.__mode = self.MODE_POLL
+        self.__calibration = (sound_speed, 0.1) # (sound speed, echo timeout), replaced as a whole
+        self.__pings = self.__timeouts = 0
+        self.set_max_range(max_range)
+        self.__edges = [None, None]
+        self.__echo_done = Event()
+        self.__window = [0] * window
+        bank.setup(pins['trig'], GPIO.OUT, initial = GPIO.LOW)
+        bank.setup(pins['echo'], GPIO.IN, pull_up_down = GPIO.PUD_DOWN)
+        self.set_mode(mode)
+
+    #Stauts.
+    @property
+    def mode(self):
+        '''
+        Get the ranging mode
+        :return: HCSR04.MODE_EDGE or HCSR04.MODE_POLL
+        '''
+        return self.__mode
+
+    @property
+    def timeout(self):
+        '''
+        Get the max seconds the echo pulse is waited for
+        :return: timeout
+        '''
+        return self.__calibration[1]
+
+    @property
+    def sound_speed(self):
+        '''
+        Get the speed of sound the echoes are converted with
+        :return: cm/s
+        '''
+        return self.__calibration[0]
+
+    @property
+    def pings(self):
+        '''
+        Get the number of pings sent
+        :return: count
+        '''
+        return self.__pings
+
+    @property
+    def timeouts(self):
+        '''
+        Get the number of pings which got no echo within the range
+        :return: count
+        '''
+        return self.__timeouts
+
+    #Verbs.
+    def set_max_range(self, max_range):
+        '''
+        Only wait for echoes from within max_range, anything farther is no echo
+        :param max_range: distance in cm
+        :return: void
+        '''
+        self.__max_range = min(max_range, self.MAX_RANGE)
+        self.set_sound_speed(self.__calibration[0])
+
+    def set_sound_speed(self, sound_speed):
+        '''
+        Set the speed of sound, pings in flight keep the one they started with
+        :param sound_speed: cm/s
+        :return: void
+        '''
+        self.__calibration = (sound_speed, 2.0 * self.__max_range / sound_speed)
+
+    def set_temperature(self, celsius):
+        '''
+        Set the speed of sound from the air temperature
+        :param celsius: air temperature
+        :return: void
+        '''
+        self.set_sound_speed(speed_of_sound(celsius))
+
+    def set_mode(self, mode):
+        '''
+        Select edge-event or busy-polling echo timing, falls back to polling
+        if edge detection can not be enabled on the echo pin
+        :param mode: HCSR04.MODE_EDGE or HCSR04.MODE_POLL
+        :return: void
+        '''
+        echo = self.__pins['echo']
+        if self.__mode == self.MODE_EDGE:
+            GPIO.remove_event_detect(echo)
+        self.__mode = self.MODE_POLL
+        if mode == self.MODE_EDGE:
+            try:
+                GPIO.add_event_detect(echo, GPIO.BOTH, callback = self.on_echo_edge)
+                self.__mode = self.MODE_EDGE
+            except RuntimeError:
+                print("Error: Unable to detect echo edges by HCSR04, polling instead")
+
+    def on_echo_edge(self, channel):
+        '''
+        Echo pin callback, records the rising and then the falling edge time. The pin level tells
+        which edge it is, so a late falling edge of the last echo is not taken for a rise
+        :param channel: echo pin
+        :return: void
+        '''
+        t = time.time()
+        edges = self.__edges
+        if GPIO.input(channel) == GPIO.HIGH:
+            if edges[1] is None:
+                edges[0] = t
+        elif edges[0] is not None and edges[1] is None:
+            edges[1] = t
+            self.__echo_done.set()
+
+    def trigger(self):
+        '''
+        Send the trigger pulse, busy-waits as sleeping can't do 10us
+        :return: void
+        '''
+        bank.output(self.__pins['trig'], GPIO.HIGH)
+        t = time.time() + self.TRIGGER_PULSE
+        while time.time() < t:
+            pass
+        bank.output(self.__pins['trig'], GPIO.LOW)
+
+    def echo_edge(self, timeout = None):
+        '''
+        Measure the echo pulse from the edge timestamps, the caller sleeps
+        until the falling edge instead of spinning on the pin
+        :param timeout: longest echo pulse in seconds, None for the one of the max range
+        :return: echo pulse width in seconds, None if no echo
+        '''
+        if timeout is None:
+            timeout = self.__calibration[1]
+        edges = self.__edges
+        edges[0] = edges[1] = None
+        self.__echo_done.clear()
+        self.trigger()
+        # Event.wait(timeout) of python 2 wakes up late, sleep in short slices instead
+        deadline = time.time() + self.RISE_TIMEOUT + timeout
+        while not self.__echo_done.is_set() and time.time() < deadline:
+            time.sleep(self.WAIT_SLICE)
+        rise, fall = edges
+        if fall is None or fall - rise > timeout:
+            return None
+        return fall - rise
+
+    def echo_poll(self, timeout = None):
+        '''
+        Measure the echo pulse by busy-polling the echo pin
+        :param timeout: longest echo pulse in seconds, None for the one of the max range
+        :return: echo pulse width in seconds, None if no echo
+        '''
+        if timeout is None:
+            timeout = self.__calibration[1]
+        echo = self.__pins['echo']
+        self.trigger()
+        stop = start = time.time()
+        while GPIO.input(echo) == GPIO.LOW:
+            stop = time.time()
+            if stop - start > self.RISE_TIMEOUT:
+                return None
+        stop = start = time.time()
+        while GPIO.input(echo) == GPIO.HIGH:
+            stop = time.time()
+            if stop - start > timeout:
+                return None
+        return stop - start
+
+    def get_distance(self, calibration = None):
+        '''
+        Get distance from HC-SR04
+        :param calibration: (sound speed, echo timeout) to use, None for the current one
+        :return: int, distance in cm, None if no echo within the range
+        '''
+        sound_speed, timeout = calibration or self.__calibration
+        if GPIO.input(self.__pins['echo']) == GPIO.HIGH:
+            # still busy with the echo of a far object from the last ping
+            width = None
+        else:
+            self.__pings += 1
+            if self.__mode == self.MODE_EDGE:
+                width = self.echo_edge(timeout)
+            else:
+                width = self.echo_poll(timeout)
+        if width is None:
+            self.__timeouts += 1
+            return None
+        return int(width * sound_speed / 2)
+
+    def burst(self, n = 3, spacing = 0.02):
+        '''
+        Fire n pings and reject the outliers, the readings are sorted into a
+        preallocated window so nothing is allocated per burst
+        :param n: number of pings, at most the window size
+        :param spacing: seconds between pings for the echoes of the last one to die out
+        :return: (median distance in cm or None if mostly no echo, confidence from 0 to 1,
+            sound speed the pings were converted with)
+        '''
+        calibration = self.__calibration
+        window = self.__window
+        n = min(n, len(window))
+        k = 0
+        i = 0
+        while i < n:
+            if i:
+                time.sleep(spacing)
+            d = self.get_distance(calibration)
+            if d is not None:
+                j = k
+                while j > 0 and window[j - 1] > d:
+                    window[j] = window[j - 1]
+                    j -= 1
+                window[j] = d
+                k += 1
+            i += 1
+        if k * 2 < n:
+            return None, float(n - k) / n, calibration[0]
+        median = window[k // 2]
+        tolerance = max(self.BURST_TOLERANCE, median // 10)
+        agree = 0
+        i = 0
+        while i < k:
+            if abs(window[i] - median) <= tolerance:
+                agree += 1
+            i += 1
+        return median, float(agree) / n, calibration[0]
@@ -16,25 +16,58 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import RPi.GPIO as GPIO
+from .gpio import GPIO
+from .pinbank import bank
+
+try:
+    import spidev
+except ImportError:
+    spidev = None
+
+REVERSED = [int('{0:08b}'.format(i)[::-1], 2) for i in range(256)]
+
+def open_spi(bus = 0, device = 0, max_speed_hz = 1000000):
+    '''
+    Open a kernel SPI device for IC_74HC595, MOSI to DS and SCLK to SHCP.
+    The SAKS HAT wires DS and SHCP to other pins, so SAKSHAT bit-bangs them
+    :param bus: SPI bus, /dev/spidev<bus>.<device>
+    :param device: chip select
+    :param max_speed_hz: clock rate
+    :return: spidev.SpiDev or None if there is no SPI device
+    '''
+    if spidev is None:
+        return None
+    try:
+        spi = spidev.SpiDev()
+        spi.open(bus, device)
+    except (IOError, OSError):
+        return None
+    spi.max_speed_hz = max_speed_hz
+    spi.mode = 0
+    return spi
 
 class IC_74HC595(object):
     '''
     IC_74HC595 class
     '''
-    __pins = {'ds':0, 'shcp':0, 'stcp':0}
-    __real_true = GPIO.HIGH
-    __data = 0x00
+    __slots__ = ('__pins', '__real_true', '__data', '__latched', '__chain', '__spi')
 
-    def __init__(self, pins, real_true = GPIO.HIGH):
+    def __init__(self, pins, real_true = GPIO.HIGH, chain = 1, spi = None):
         '''
         Init the ic
         :param pin: pin number
         :param real_true: GPIO.HIGH or GPIO.LOW
+        :param chain: number of daisy-chained ics, the data has 8 bits for each
+        :param spi: object with writebytes() like spidev.SpiDev to shift the data with, see open_spi(),
+            DS and SHCP must be wired to MOSI and SCLK. None to bit-bang DS and SHCP
         :return: void
         '''
         self.__pins = pins
         self.__real_true = real_true
+        self.__data = 0x00
+        self.__latched = None
+        self.__chain = chain
+        self.__spi = spi
 
     #Stauts.
     @property
@@ -45,22 +78,38 @@ class IC_74HC595(object):
         '''
         return self.__data
 
+    @property
+    def chain(self):
+        '''
+        Return the number of daisy-chained ics
+        :return: chain length
+        '''
+        return self.__chain
+
+    @property
+    def spi(self):
+        '''
+        Return the SPI device shifting the data, None when bit-banging
+        :return: spi
+        '''
+        return self.__spi
+
     #Verbs.
     def flush_shcp(self):
         '''
         Flush a shcp
         :return: void
         '''
-        GPIO.output(self.__pins['shcp'], not self.__real_true)
-        GPIO.output(self.__pins['shcp'], self.__real_true)
+        bank.output(self.__pins['shcp'], not self.__real_true)
+        bank.output(self.__pins['shcp'], self.__real_true)
 
     def flush_stcp(self):
         '''
         Flush a stcp
         :return: void
         '''
-        GPIO.output(self.__pins['stcp'], not self.__real_true)
-        GPIO.output(self.__pins['stcp'], self.__real_true)
+        bank.output(self.__pins['stcp'], not self.__real_true)
+        bank.output(self.__pins['stcp'], self.__real_true)
 
     def set_bit(self, bit):
         '''
@@ -68,20 +117,48 @@ class IC_74HC595(object):
         :param bit: bit
         :return: void
         '''
-        GPIO.output(self.__pins['ds'], bit)
+        bank.output(self.__pins['ds'], bit)
         self.flush_shcp()
 
     def set_data(self, data):
         '''
-        Set a byte
+        Set the data, 8 bits for each ic of the chain, shifted out from bit 0 and latched once.
+        Nothing is sent if the ics have latched the data already
         :param data: data
         :return: void
         '''
         self.__data = data
-        for i in range (0, 8):
-            self.set_bit((self.__data >> i) & 0x01)
+        if data == self.__latched:
+            return
+        if self.__spi is not None:
+            # SPI sends MSB first, bit 0 has to go first as when bit-banging
+            self.__spi.writebytes([REVERSED[(data >> (8 * i)) & 0xff] for i in range(self.__chain)])
+        else:
+            for i in range (0, 8 * self.__chain):
+                self.set_bit((data >> i) & 0x01)
 
         self.flush_stcp()
+        self.__latched = data
+
+    def set_bits(self, mask, value):
+        '''
+        Set the bits in mask to those of value, leaving the others as they are
+        :param mask: bits to set
+        :param value: new bits
+        :return: void
+        '''
+        self.set_data((self.__data & ~mask) | (value & mask))
+
+    def set_frame(self, frame):
+        '''
+        Set the data from bytes
+        :param frame: bytes array, the first one is bits 0 to 7
+        :return: void
+        '''
+        data = 0
+        for i in range(len(frame)):
+            data |= (frame[i] & 0xff) << (8 * i)
+        self.set_data(data)
 
 
     def clear(self):
@@ -16,45 +16,106 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import RPi.GPIO as GPIO
+from .gpio import GPIO
+from .pinbank import bank
 import time
 
 class IC_TM1637(object):
     '''
     IC_TM1637 class
     '''
-    __pins = {'di' : 0, 'clk' : 0}
-    __real_true = GPIO.HIGH
+    HALF_PERIOD = 5         # us, the chip is fine with well under 10us
+    SLEEP_THRESHOLD = 500   # us, longer delays sleep, shorter ones busy-wait
+    CALIBRATE_WRITES = 200  # GPIO writes timed by calibrate()
 
-    def __init__(self, pins, real_true = GPIO.HIGH):
+    # bus_delay is the delay between the bus edges, picked by set_half_period()
+    __slots__ = ('__pins', '__real_true', '__data_command', '__half_period', '__output_cost', '__wait', 'bus_delay')
+
+    def __init__(self, pins, real_true = GPIO.HIGH, half_period = HALF_PERIOD):
         '''
         Init the ic
         :param pin: pin number
         :param real_true: GPIO.HIGH or GPIO.LOW
+        :param half_period: us between the bus edges
         :return: void
         '''
         self.__pins = pins
         self.__real_true = real_true
+        self.__data_command = None
+        self.__output_cost = 0.0
+        self.set_half_period(half_period)
 
-    #Verbs.
-    def bus_delay(self):
+    #Stauts.
+    @property
+    def half_period(self):
+        '''
+        Get the time between the bus edges
+        :return: us
+        '''
+        return self.__half_period
+
+    @property
+    def output_cost(self):
         '''
-        Delay
+        Get the measured cost of a GPIO write, see calibrate()
+        :return: us
+        '''
+        return self.__output_cost * 1000000
+
+    def set_half_period(self, half_period):
+        '''
+        Set the time between the bus edges and pick the cheapest delay meeting it:
+        none if a GPIO write takes that long already, a busy-wait for short ones, a sleep otherwise
+        :param half_period: us
         :return: void
         '''
-        time.sleep(0.001)
+        self.__half_period = half_period
+        self.__wait = half_period / 1000000.0 - self.__output_cost
+        if self.__wait <= 0:
+            self.bus_delay = self.no_delay
+        elif half_period < self.SLEEP_THRESHOLD:
+            self.bus_delay = self.spin_delay
+        else:
+            self.bus_delay = self.sleep_delay
+
+    #Verbs.
+    def calibrate(self):
+        '''
+        Measure the cost of a GPIO write on the current backend, the delays take it off the half period
+        :return: the cost in us
+        '''
+        clk = self.__pins['clk']
+        # rewrite the level clk has, the chip sees no edge
+        level = GPIO.input(clk)
+        t = time.time()
+        for i in range(self.CALIBRATE_WRITES):
+            GPIO.output(clk, level)
+        self.__output_cost = (time.time() - t) / self.CALIBRATE_WRITES
+        self.set_half_period(self.__half_period)
+        return self.output_cost
+
+    def no_delay(self):
+        pass
+
+    def spin_delay(self):
+        end = time.time() + self.__wait
+        while time.time() < end:
+            pass
+
+    def sleep_delay(self):
+        time.sleep(self.__wait)
 
     def start_bus(self):
         '''
         Start bus
         :return: void
         '''
-        GPIO.output(self.__pins['clk'], self.__real_true)
-        GPIO.output(self.__pins['di'], self.__real_true)
+        bank.output(self.__pins['clk'], self.__real_true)
+        bank.output(self.__pins['di'], self.__real_true)
         self.bus_delay()
-        GPIO.output(self.__pins['di'], not self.__real_true)
+        bank.output(self.__pins['di'], not self.__real_true)
         self.bus_delay()
-        GPIO.output(self.__pins['clk'], not self.__real_true)
+        bank.output(self.__pins['clk'], not self.__real_true)
         self.bus_delay()
 
     def stop_bus(self):
@@ -62,13 +123,13 @@ class IC_TM1637(object):
         Stop bus
         :return: void
         '''
-        GPIO.output(self.__pins['clk'], not self.__real_true)
+        bank.output(self.__pins['clk'], not self.__real_true)
         self.bus_delay()
-        GPIO.output(self.__pins['di'], not self.__real_true)
+        bank.output(self.__pins['di'], not self.__real_true)
         self.bus_delay()
-        GPIO.output(self.__pins['clk'], self.__real_true)
+        bank.output(self.__pins['clk'], self.__real_true)
         self.bus_delay()
-        GPIO.output(self.__pins['di'], self.__real_true)
+        bank.output(self.__pins['di'], self.__real_true)
         self.bus_delay()
 
     def set_bit(self, bit):
@@ -77,11 +138,11 @@ class IC_TM1637(object):
         :param bit: bit
         :return: void
         '''
-        GPIO.output(self.__pins['clk'], not self.__real_true)
+        bank.output(self.__pins['clk'], not self.__real_true)
         self.bus_delay()
-        GPIO.output(self.__pins['di'], bit)
+        bank.output(self.__pins['di'], bit)
         self.bus_delay()
-        GPIO.output(self.__pins['clk'], self.__real_true)
+        bank.output(self.__pins['clk'], self.__real_true)
         self.bus_delay()
 
     def set_byte(self, data):
@@ -93,13 +154,13 @@ class IC_TM1637(object):
         for i in range (0, 8):
             self.set_bit((data >> i) & 0x01)
 
-        GPIO.output(self.__pins['clk'], not self.__real_true)
+        bank.output(self.__pins['clk'], not self.__real_true)
         self.bus_delay()
 
-        GPIO.output(self.__pins['di'], self.__real_true)
+        bank.output(self.__pins['di'], self.__real_true)
         self.bus_delay()
 
-        GPIO.output(self.__pins['clk'], self.__real_true)
+        bank.output(self.__pins['clk'], self.__real_true)
         self.bus_delay()
 
     def set_command(self, command):
@@ -111,6 +172,8 @@ class IC_TM1637(object):
         self.start_bus()
         self.set_byte(command)
         self.start_bus()
+        if command & 0xc0 == 0x40:
+            self.__data_command = command
 
     def set_data(self, address, data):
         '''
@@ -124,6 +187,25 @@ class IC_TM1637(object):
         self.set_byte(data)
         self.start_bus()
 
+    def set_frame(self, address, data):
+        '''
+        Set bytes to consecutive addresses in one transaction, with the
+        address auto-increment mode
+        :param address: address of the first byte
+        :param data: bytes array
+        :return: void
+        '''
+        if self.__data_command != 0x40:
+            self.start_bus()
+            self.set_byte(0x40)
+            self.stop_bus()
+            self.__data_command = 0x40
+        self.start_bus()
+        self.set_byte(address)
+        for d in data:
+            self.set_byte(d)
+        self.stop_bus()
+
     def clear(self):
         '''
         Clear the data
@@ -16,19 +16,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import RPi.GPIO as GPIO
+from .gpio import GPIO
+from .pinbank import bank
+from .scheduler import scheduler
 import time
-from threading import Thread
+from . import pulse
 
 class Led(object):
     '''
     Led class
     '''
-    __pin = 0
-    __real_true = GPIO.HIGH
-    __pwm = None
-    __is_on = False
-    __is_pulse = None
+    __slots__ = ('__pin', '__real_true', '__pwm', '__hertz', '__is_on', '__is_pulse')
 
     def __init__(self, pin, real_true = GPIO.HIGH):
         '''
@@ -39,6 +37,10 @@ class Led(object):
         '''
         self.__pin = pin
         self.__real_true = real_true
+        self.__pwm = None
+        self.__hertz = None
+        self.__is_on = False
+        self.__is_pulse = False
 
     #Stauts.
     @property
@@ -54,7 +56,7 @@ class Led(object):
         Set the led on
         '''
         if not self.__is_pulse:
-            GPIO.output(self.__pin, self.__real_true)
+            bank.output(self.__pin, self.__real_true)
             self.__is_on = True
 
     def off(self):
@@ -63,11 +65,19 @@ class Led(object):
         '''
         if self.__is_pulse:
             self.__is_pulse = False
+            pulse.engine.remove(self)
             self.__pwm.stop()
-            time.sleep(0.1)
-        GPIO.output(self.__pin, not self.__real_true)
+            # the soft PWM thread may still write the pin until its cycle ends, write it again after that
+            scheduler.after(2.0 / self.__hertz, self.settle, name = 'led')
+            bank.forget(self.__pin) # the PWM left the pin at whatever level, write it for sure
+        bank.output(self.__pin, not self.__real_true)
         self.__is_on = False
 
+    def settle(self):
+        if not self.__is_pulse:
+            bank.forget(self.__pin)
+            bank.output(self.__pin, self.__real_true if self.__is_on else not self.__real_true)
+
     #functions.
     def flash(self, seconds):
         '''
@@ -93,40 +103,24 @@ class Led(object):
             self.flash(secs)
             time.sleep(sleepsecs)
 
-    def pulse(self, hertz=50, pause_time=0.01):
+    def pulse(self, hertz=50, pause_time=0.01, start=None, phase=0.0):
         '''
-        Breath until led off
+        Breath until led off, the pulse engine drives the duty cycle
         :param hertz: GPIO PWM hertz
         :param pause_time: breath pause time
+        :param start: time the breath starts, None for now, leds given the same one breath in step
+        :param phase: fraction of the breath to be ahead by, from 0 to 1
         :return: void
         '''
         if self.__pwm == None:
             self.__pwm = GPIO.PWM(self.__pin, hertz)
         else:
             self.__pwm.ChangeFrequency(hertz)
-        self.__pwm.start(0)
-        if self.__is_pulse == None:
-            def pulse_worker():
-                while True:
-                    if self.__is_pulse:
-                        try:
-                            for i in xrange(0, 101, 1):
-                                self.__pwm.ChangeDutyCycle(i)
-                                # off
-                                time.sleep(pause_time)
-                            time.sleep(1)
-                            for i in xrange(100, -1, -1):
-                                self.__pwm.ChangeDutyCycle(i)
-                                # on
-                                time.sleep(pause_time)
-                        except:
-                            continue
-            try:
-                pulse_thread = Thread(target = pulse_worker)
-                pulse_thread.setDaemon(True)
-                pulse_thread.start()
-            except:
-                print('Error: Unable to start thread by Led')
+        self.__hertz = hertz
+        if not self.__is_pulse:
+            self.__pwm.start(0)
+            bank.forget(self.__pin) # the PWM drives the pin behind the bank now
+        pulse.engine.add(self, self.__pwm, pulse.waveform(pause_time), pause_time, start, phase)
         self.__is_pulse = True
         self.__is_on = True
 
@@ -134,9 +128,7 @@ class LedRow(object):
     '''
     Class of leds in row
     '''
-    __leds = []
-    __pins = []
-    __real_true = GPIO.HIGH
+    __slots__ = ('__leds', '__pins', '__real_true')
 
     def __init__(self, pins, real_true = GPIO.HIGH):
         '''
@@ -147,8 +139,7 @@ class LedRow(object):
         '''
         self.__pins = pins
         self.__real_true = real_true
-        for p in pins:
-            self.__leds.append(Led(p, real_true))
+        self.__leds = [Led(p, real_true) for p in pins]
 
     #Stauts.
     #@property
@@ -216,6 +207,19 @@ class LedRow(object):
         '''
         self.__leds[index].off()
 
+    def pulse(self, hertz=50, pause_time=0.01, spread=0.0):
+        '''
+        Breath all the leds in step until they are off
+        e.g. pulse(spread=0.25) for a wave along 4 leds
+        :param hertz: GPIO PWM hertz
+        :param pause_time: breath pause time
+        :param spread: fraction of the breath each led is behind the one before it
+        :return: void
+        '''
+        start = time.time()
+        for i in range(len(self.__leds)):
+            self.__leds[i].pulse(hertz, pause_time, start, (-i * spread) % 1.0)
+
     def set_row(self, status):
         '''
         Set the ledrow's status in boolean array
@@ -16,36 +16,46 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import RPi.GPIO as GPIO
+from .gpio import GPIO
 from .ic_74hc595 import IC_74HC595 as IC_74HC595
 
 class Led74HC595(object):
     '''
     Class of leds in 74HC595
     '''
-    __ic_74hc595 = None
+    __slots__ = ('__ic_74hc595', '__count')
 
-    def __init__(self, pins, real_true = GPIO.HIGH):
+    def __init__(self, pins, real_true = GPIO.HIGH, chain = 1):
         '''
         Init the leds
         :param pin: pin numbers in array
         :param real_true: GPIO.HIGH or GPIO.LOW
+        :param chain: number of daisy-chained 74HC595, 8 leds each
         :return: void
         '''
-        self.__ic_74hc595 = IC_74HC595(pins, real_true)
+        self.__ic_74hc595 = IC_74HC595(pins, real_true, chain)
+        self.__count = 8 * chain
 
     #Stauts.
     @property
     def ic(self):
         return  self.__ic_74hc595
 
+    @property
+    def count(self):
+        '''
+        Get the number of leds in the ledrow
+        :return: count
+        '''
+        return self.__count
+
     def is_on(self, index):
         '''
         Get status of led in ledrow by index
         :param index: index of the led
         :return: status in boolean
         '''
-        if index >= 8:
+        if index >= self.__count:
             return False
         return self.__ic_74hc595.data >> index & 0x01
 
@@ -56,7 +66,7 @@ class Led74HC595(object):
         :return: status array
         '''
         r = []
-        for i in range (0, 8):
+        for i in range (0, self.__count):
             r.append(self.__ic_74hc595.data >> i & 0x01)
         return r
 
@@ -66,7 +76,7 @@ class Led74HC595(object):
         Set all the leds on
         :return: void
         '''
-        self.__ic_74hc595.set_data(0xff)
+        self.__ic_74hc595.set_data((1 << self.__count) - 1)
 
     def off(self):
         '''
@@ -80,27 +90,36 @@ class Led74HC595(object):
         Set the led on by index in the ledrow
         :return: void
         '''
-        self.__ic_74hc595.set_data(self.__ic_74hc595.data | (0x01 << (index)))
+        self.__ic_74hc595.set_bits(0x01 << index, ~0)
 
     def off_for_index(self, index):
         '''
         Set the led off by index in the ledrow
         :return: void
         '''
-        arr = [0xfe, 0xfd, 0xfb, 0xf7, 0xef, 0xdf, 0xbf, 0x7f]
-        self.__ic_74hc595.set_data(self.__ic_74hc595.data & arr[index])
+        self.__ic_74hc595.set_bits(0x01 << index, 0)
 
     def set_row(self, status):
         '''
-        Set the ledrow's status in boolean array
-        :param status: boolean array
+        Set the ledrow's status in boolean array, with a single shift
+        :param status: boolean array, None leaves the led as it is
         :return: void
         '''
+        mask = value = 0
         for i in range(len(status)):
             #print(str(i) + str(status[i]))
             if status[i] is None:
                 continue
+            mask |= 0x01 << i
             if status[i]:
-                self.on_for_index(i)
-            else:
-                self.off_for_index(i)
+                value |= 0x01 << i
+        self.__ic_74hc595.set_bits(mask, value)
+
+    def set_mask(self, mask, value):
+        '''
+        Set the leds in mask on or off as the bits of value, with a single shift
+        :param mask: bit i for the led i
+        :param value: bit i on for led i on
+        :return: void
+        '''
+        self.__ic_74hc595.set_bits(mask, value)
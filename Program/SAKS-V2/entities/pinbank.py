@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from threading import Lock
+from .gpio import GPIO
+
+class PinBank(object):
+    '''
+    Shadow register of the output pins, writes of the level a pin has already are skipped.
+    Everything driving outputs goes through the one bank, see entities.pinbank.bank
+    '''
+    __slots__ = ('__levels', '__writes', '__elided', '__lock')
+
+    def __init__(self):
+        '''
+        Init the pin bank, no level is known yet
+        :return: void
+        '''
+        self.__levels = {}
+        self.__writes = 0
+        self.__elided = 0
+        self.__lock = Lock()
+
+    #Stauts.
+    @property
+    def writes(self):
+        '''
+        Get the number of pin writes issued to GPIO
+        :return: count
+        '''
+        return self.__writes
+
+    @property
+    def elided(self):
+        '''
+        Get the number of pin writes skipped as the pin had the level already
+        :return: count
+        '''
+        return self.__elided
+
+    def level(self, pin):
+        '''
+        Get the last level driven on a pin
+        :param pin: pin number
+        :return: GPIO.HIGH, GPIO.LOW or None if unknown
+        '''
+        return self.__levels.get(pin)
+
+    def reset_counters(self):
+        '''
+        Zero the write counters
+        :return: void
+        '''
+        self.__writes = self.__elided = 0
+
+    #Verbs.
+    def setup(self, pin, direction, **kwargs):
+        '''
+        Set up a pin, see GPIO.setup
+        :param pin: pin number
+        :param direction: GPIO.OUT or GPIO.IN
+        :return: void
+        '''
+        with self.__lock:
+            GPIO.setup(pin, direction, **kwargs)
+            if direction == GPIO.OUT and 'initial' in kwargs:
+                self.__levels[pin] = GPIO.HIGH if kwargs['initial'] else GPIO.LOW
+            else:
+                self.__levels.pop(pin, None)
+
+    def cleanup(self):
+        '''
+        Release all the pins, see GPIO.cleanup
+        :return: void
+        '''
+        with self.__lock:
+            GPIO.cleanup()
+            self.__levels.clear()
+
+    def forget(self, pin = None):
+        '''
+        Drop the shadow level of a pin driven behind the bank's back, so the next write goes out
+        :param pin: pin number, None for all
+        :return: void
+        '''
+        with self.__lock:
+            if pin is None:
+                self.__levels.clear()
+            else:
+                self.__levels.pop(pin, None)
+
+    def output(self, pin, level):
+        '''
+        Drive a pin, unless it has the level already
+        :param pin: pin number
+        :param level: level, anything true is GPIO.HIGH
+        :return: void
+        '''
+        level = GPIO.HIGH if level else GPIO.LOW
+        with self.__lock:
+            if self.__levels.get(pin) == level:
+                self.__elided += 1
+                return
+            GPIO.output(pin, level)
+            self.__levels[pin] = level
+            self.__writes += 1
+
+    def output_many(self, pins, levels):
+        '''
+        Drive pins in order, the ones to change in a single GPIO call
+        :param pins: pin numbers array
+        :param levels: levels array, or one level for all the pins
+        :return: void
+        '''
+        if not isinstance(levels, (list, tuple)):
+            levels = [levels] * len(pins)
+        with self.__lock:
+            changed, values = [], []
+            for pin, level in zip(pins, levels):
+                level = GPIO.HIGH if level else GPIO.LOW
+                if self.__levels.get(pin) == level:
+                    continue
+                self.__levels[pin] = level
+                changed.append(pin)
+                values.append(level)
+            self.__elided += len(pins) - len(changed)
+            if changed:
+                GPIO.output(changed, values)
+                self.__writes += len(changed)
+
+bank = PinBank()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+from threading import Lock
+from .scheduler import scheduler
+
+GAMMA = 2.2 # the eye sees duty cycle d as brightness d ** (1 / GAMMA)
+
+_waveforms = {}
+
+def waveform(pause_time = 0.01, hold = 1.0, gamma = GAMMA):
+    '''
+    Get the duty cycles of one breath, up from off to full, held, then back down, one every pause_time.
+    The ramps are gamma corrected so the brightness changes evenly, tables are computed once
+    :param pause_time: seconds per duty cycle
+    :param hold: seconds held at full
+    :param gamma: gamma of the correction, 1 for none
+    :return: duty cycles tuple
+    '''
+    key = (pause_time, hold, gamma)
+    table = _waveforms.get(key)
+    if table is None:
+        up = [round(100 * (i / 100.0) ** gamma, 1) for i in range(101)]
+        table = tuple(up + [100.0] * int(round(hold / pause_time)) + up[::-1])
+        _waveforms[key] = table
+    return table
+
+class Pulse(object):
+    '''
+    A PWM driven by the pulse engine
+    '''
+    __slots__ = ('pwm', 'table', 'pause_time', 'start', 'offset', 'duty')
+
+    def __init__(self, pwm, table, pause_time, start, phase):
+        self.pwm = pwm
+        self.table = table
+        self.pause_time = pause_time
+        self.start = start
+        self.offset = phase * len(table)
+        self.duty = None
+
+class PulseEngine(object):
+    '''
+    Drives the duty cycles of all the pulsing leds from one scheduler task. Only the duty cycles that
+    change are written, and the task is cancelled while nothing pulses, see entities.pulse.engine
+    '''
+    __slots__ = ('__pulses', '__task', '__period', '__lock')
+
+    def __init__(self):
+        '''
+        Init the pulse engine, it runs while something pulses
+        :return: void
+        '''
+        self.__pulses = {}
+        self.__task = None
+        self.__period = None
+        self.__lock = Lock()
+
+    #Stauts.
+    @property
+    def count(self):
+        '''
+        Get the number of PWMs pulsing
+        :return: count
+        '''
+        return len(self.__pulses)
+
+    @property
+    def is_running(self):
+        '''
+        Get whether the engine task is scheduled
+        '''
+        return self.__task is not None
+
+    #Verbs.
+    def add(self, key, pwm, table, pause_time = 0.01, start = None, phase = 0.0):
+        '''
+        Start pulsing a PWM, or change how it pulses
+        :param key: owner of the PWM, to remove it by
+        :param pwm: PWM, started already
+        :param table: duty cycles of one breath, see waveform
+        :param pause_time: seconds per duty cycle
+        :param start: time the breath started, the same one keeps PWMs in step, None for now
+        :param phase: fraction of the breath to be ahead by, from 0 to 1
+        :return: void
+        '''
+        with self.__lock:
+            self.__pulses[key] = Pulse(pwm, table, pause_time, time.time() if start is None else start, phase)
+            self.reschedule()
+
+    def remove(self, key):
+        '''
+        Stop pulsing a PWM, it is not written once this returns
+        :param key: owner of the PWM
+        :return: void
+        '''
+        with self.__lock:
+            if self.__pulses.pop(key, None) is not None:
+                self.reschedule()
+
+    def reschedule(self):
+        period = min([p.pause_time for p in self.__pulses.values()]) if self.__pulses else None
+        if period == self.__period:
+            return
+        if self.__task is not None:
+            self.__task.cancel()
+            self.__task = None
+        self.__period = period
+        if period is not None:
+            self.__task = scheduler.every(period, self.tick, name = 'pulse')
+
+    def tick(self):
+        now = time.time()
+        with self.__lock:
+            for p in self.__pulses.values():
+                duty = p.table[int((now - p.start) / p.pause_time + p.offset) % len(p.table)]
+                if duty != p.duty:
+                    p.pwm.ChangeDutyCycle(duty)
+                    p.duty = duty
+
+engine = PulseEngine()
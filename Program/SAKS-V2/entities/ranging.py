@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+from collections import namedtuple
+from threading import Thread, Condition, Event, current_thread
+
+Sample = namedtuple('Sample', ['seq', 'time', 'distance', 'confidence', 'sound_speed'])
+
+class SampleRing(object):
+    '''
+    Bounded ring of samples with a single writer, readers never take a lock
+    '''
+    __slots__ = ('__slots', '__count')
+
+    def __init__(self, size = 16):
+        '''
+        Init the ring
+        :param size: number of samples kept
+        :return: void
+        '''
+        self.__slots = [None] * size
+        self.__count = 0
+
+    #Stauts.
+    @property
+    def count(self):
+        '''
+        Get the number of samples ever pushed, also the next sequence number
+        :return: count
+        '''
+        return self.__count
+
+    @property
+    def latest(self):
+        '''
+        Get the newest sample
+        :return: Sample or None
+        '''
+        n = self.__count
+        if n == 0:
+            return None
+        return self.__slots[(n - 1) % len(self.__slots)]
+
+    def since(self, seq):
+        '''
+        Get the samples newer than seq that are still in the ring, oldest first
+        :param seq: sequence number of the last sample seen
+        :return: samples array
+        '''
+        n = self.__count
+        size = len(self.__slots)
+        first = max(seq + 1, n - size)
+        r = []
+        for i in range(first, n):
+            r.append(self.__slots[i % size])
+        return r
+
+    #Verbs.
+    def push(self, t, distance, confidence = 1.0, sound_speed = None):
+        '''
+        Publish a sample, only the owning thread may call this
+        :param t: time of the sample
+        :param distance: distance in cm
+        :param confidence: share of the pings that agree with distance
+        :param sound_speed: speed of sound in cm/s the distance was converted with
+        :return: the sample
+        '''
+        n = self.__count
+        sample = Sample(n, t, distance, confidence, sound_speed)
+        self.__slots[n % len(self.__slots)] = sample
+        self.__count = n + 1
+        return sample
+
+class RangingService(object):
+    '''
+    Ranging service, a thread that owns the sensor and samples it at a fixed rate
+    '''
+    __slots__ = ('__sensor', '__rate', '__burst', '__spacing', '__ring', '__running', '__stop', '__thread',
+        '__thermometer', '__temperature', '__fresh')
+
+    def __init__(self, sensor, rate = 2.0, size = 16, burst = 1, spacing = 0.02, thermometer = None):
+        '''
+        Init the ranging service
+        :param sensor: object with burst(n, spacing) and set_temperature(celsius), e.g. HCSR04
+        :param rate: samples per second
+        :param size: number of samples kept in the ring
+        :param burst: pings per sample
+        :param spacing: seconds between the pings of a burst
+        :param thermometer: object with reading, (celsius or None, age), refreshed by someone else,
+            e.g. a started DS18B20. The sensor gets its temperature between the bursts
+        :return: void
+        '''
+        self.__sensor = sensor
+        self.__thermometer = thermometer
+        self.__rate = rate
+        self.__burst = burst
+        self.__spacing = spacing
+        self.__ring = SampleRing(size)
+        self.__running = False
+        self.__stop = Event()
+        self.__thread = None
+        self.__temperature = None
+        self.__fresh = Condition()
+
+    #Stauts.
+    @property
+    def ring(self):
+        '''
+        Get the sample ring
+        :return: ring
+        '''
+        return self.__ring
+
+    @property
+    def latest(self):
+        '''
+        Get the newest sample without waiting
+        :return: Sample or None
+        '''
+        return self.__ring.latest
+
+    @property
+    def rate(self):
+        '''
+        Get the sample rate
+        :return: samples per second
+        '''
+        return self.__rate
+
+    def set_rate(self, rate):
+        '''
+        Set the sample rate, takes effect from the next sample
+        :param rate: samples per second
+        :return: void
+        '''
+        self.__rate = rate
+
+    @property
+    def burst(self):
+        '''
+        Get the number of pings per sample
+        :return: burst size
+        '''
+        return self.__burst
+
+    def set_burst(self, burst):
+        '''
+        Set the number of pings per sample, more pings reject more noise but take longer
+        :param burst: burst size
+        :return: void
+        '''
+        self.__burst = burst
+
+    @property
+    def temperature(self):
+        '''
+        Get the temperature the sensor was last given
+        :return: Celsius temperature, None if there is no thermometer or reading yet
+        '''
+        return self.__temperature
+
+    #Verbs.
+    def start(self):
+        '''
+        Start the service thread
+        :return: void
+        '''
+        if self.__running:
+            return
+        self.__running = True
+        self.__stop.clear()
+        try:
+            t1 = Thread(target = self.sampling)
+            t1.setDaemon(True)
+            t1.start()
+            self.__thread = t1
+        except:
+            self.__running = False
+            print("Error: Unable to start thread by RangingService")
+
+    def stop(self):
+        '''
+        Stop the service thread after its current ping, and wait for it to end
+        :return: void
+        '''
+        self.__running = False
+        self.__stop.set()
+        thread, self.__thread = self.__thread, None
+        if thread is not None and thread is not current_thread():
+            thread.join(1.0)
+
+    def wait_sample(self, seq = None, timeout = None):
+        '''
+        Wait for a sample newer than seq
+        :param seq: sequence number of the last sample seen, None for the newest one now
+        :param timeout: max seconds to wait, None to wait forever
+        :return: Sample or None on timeout
+        '''
+        if seq is None:
+            seq = self.__ring.count - 1
+        deadline = None if timeout is None else time.time() + timeout
+        with self.__fresh:
+            while self.__ring.count <= seq + 1:
+                if deadline is None:
+                    self.__fresh.wait()
+                else:
+                    left = deadline - time.time()
+                    if left <= 0:
+                        return None
+                    self.__fresh.wait(left)
+        return self.__ring.latest
+
+    def sampling(self):
+        next_ping = time.time()
+        while self.__running:
+            if self.__thermometer is not None:
+                celsius = self.__thermometer.reading[0]
+                if celsius is not None and celsius != self.__temperature:
+                    self.__temperature = celsius
+                    self.__sensor.set_temperature(celsius)
+            d, c, v = self.__sensor.burst(self.__burst, self.__spacing)
+            self.__ring.push(time.time(), d, c, v)
+            with self.__fresh:
+                self.__fresh.notify_all()
+            next_ping += 1.0 / self.__rate
+            left = next_ping - time.time()
+            if left > 0:
+                self.__stop.wait(left)
+            else:
+                next_ping = time.time()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+import heapq
+from threading import Thread, Condition, current_thread
+
+class Task(object):
+    '''
+    A function the scheduler calls once, or at fixed deadlines every period
+    '''
+    __slots__ = ('__scheduler', '__function', '__args', '__name', '__period', '__deadline', '__active', '__runs',
+        '__overruns', '__skipped', '__max_late')
+
+    def __init__(self, scheduler, function, args, deadline, period = None, name = None):
+        '''
+        Init the task, see Scheduler.after and Scheduler.every to make one
+        :param scheduler: Scheduler running the task
+        :param function: function to call
+        :param args: arguments of the function
+        :param deadline: time of the first call
+        :param period: seconds between the calls, None to call once
+        :param name: name in the reports, the function name by default
+        :return: void
+        '''
+        self.__scheduler = scheduler
+        self.__function = function
+        self.__args = tuple(args)
+        self.__deadline = deadline
+        self.__period = period
+        self.__name = name or getattr(function, '__name__', 'task')
+        self.__active = True
+        self.__runs = 0
+        self.__overruns = 0
+        self.__skipped = 0
+        self.__max_late = 0.0
+
+    #Stauts.
+    @property
+    def name(self):
+        return self.__name
+
+    @property
+    def period(self):
+        return self.__period
+
+    @property
+    def deadline(self):
+        '''
+        Get the time the task is due next
+        '''
+        return self.__deadline
+
+    @property
+    def active(self):
+        '''
+        Get whether the task is still to be called, one-shot tasks are done once called
+        '''
+        return self.__active
+
+    @property
+    def runs(self):
+        return self.__runs
+
+    @property
+    def overruns(self):
+        '''
+        Get the number of calls that ended past the next deadline
+        '''
+        return self.__overruns
+
+    @property
+    def skipped(self):
+        '''
+        Get the number of calls dropped to catch up after overruns
+        '''
+        return self.__skipped
+
+    @property
+    def max_late(self):
+        '''
+        Get the longest a call started after its deadline
+        :return: seconds
+        '''
+        return self.__max_late
+
+    #Verbs.
+    def cancel(self):
+        '''
+        Stop calling the task, a call running now still ends
+        :return: void
+        '''
+        self.__active = False
+        self.__scheduler.discard(self)
+
+    def run(self, now):
+        '''
+        Call the function, the scheduler does at the deadline. A periodic task is then due a period
+        after its last deadline, not after the call, so the rate does not drift. Ticks already missed
+        are skipped, not bunched up
+        :param now: time the call starts
+        :return: True if the task is due again
+        '''
+        if not self.__active:
+            return False
+        self.__max_late = max(self.__max_late, now - self.__deadline)
+        self.__runs += 1
+        try:
+            self.__function(*self.__args)
+        except Exception as e:
+            print("Error: Task %s stopped: %s" % (self.__name, e))
+            self.__active = False
+            return False
+        if self.__period is None or not self.__active:
+            self.__active = False
+            return False
+        self.__deadline += self.__period
+        late = time.time() - self.__deadline
+        if late > 0:
+            missed = int(late / self.__period)
+            self.__overruns += 1
+            self.__skipped += missed
+            self.__deadline += missed * self.__period
+        return True
+
+class Scheduler(object):
+    '''
+    Calls the periodic and one-shot tasks of all the devices from one thread.
+    Everything timed goes through the one scheduler, see entities.scheduler.scheduler
+    '''
+    __slots__ = ('__queue', '__tasks', '__count', '__thread', '__wakeup', 'overrun_handler')
+
+    def __init__(self):
+        '''
+        Init the scheduler, the thread starts with the first task
+        :return: void
+        '''
+        self.__queue = [] # heap of (deadline, count, task)
+        self.__tasks = []
+        self.__count = 0
+        self.__thread = None
+        self.__wakeup = Condition()
+        self.overrun_handler = None # called with the task after each overrun
+
+    #Stauts.
+    @property
+    def tasks(self):
+        '''
+        Get the periodic tasks still running
+        :return: tasks array
+        '''
+        return [t for t in self.__tasks if t.active]
+
+    def report(self):
+        '''
+        Tell how the periodic tasks kept up
+        :return: string, e.g. 'tick 120 runs 1 overruns 0 skipped 3.2ms late'
+        '''
+        return ', '.join(['%s %d runs %d overruns %d skipped %.1fms late' % (t.name, t.runs, t.overruns, t.skipped,
+            t.max_late * 1000) for t in self.__tasks])
+
+    #Verbs.
+    def after(self, delay, function, args = (), name = None):
+        '''
+        Call a function once
+        :param delay: seconds from now
+        :param function: function to call
+        :param args: arguments of the function
+        :param name: name in the reports
+        :return: Task, to cancel it
+        '''
+        return self.add(Task(self, function, args, time.time() + delay, None, name))
+
+    def every(self, period, function, args = (), name = None, delay = 0):
+        '''
+        Call a function at a fixed rate
+        :param period: seconds between the calls
+        :param function: function to call
+        :param args: arguments of the function
+        :param name: name in the reports
+        :param delay: seconds from now to the first call
+        :return: Task, to cancel it
+        '''
+        task = self.add(Task(self, function, args, time.time() + delay, period, name))
+        with self.__wakeup:
+            self.__tasks = [t for t in self.__tasks if t.active] + [task]
+        return task
+
+    def add(self, task):
+        '''
+        Queue a task, starting the scheduler thread if need be
+        :param task: Task
+        :return: the task
+        '''
+        with self.__wakeup:
+            self.push(task)
+            self.__wakeup.notify()
+        self.start()
+        return task
+
+    def discard(self, task):
+        '''
+        Drop a cancelled task from the queue, so an idle scheduler does not wake up for it
+        :param task: Task
+        :return: void
+        '''
+        with self.__wakeup:
+            queue = [e for e in self.__queue if e[2] is not task]
+            if len(queue) != len(self.__queue):
+                heapq.heapify(queue)
+                self.__queue = queue
+                self.__wakeup.notify()
+
+    def push(self, task):
+        self.__count += 1
+        heapq.heappush(self.__queue, (task.deadline, self.__count, task))
+
+    def start(self):
+        '''
+        Start the scheduler thread, once
+        :return: void
+        '''
+        with self.__wakeup:
+            if self.__thread is not None:
+                return
+            try:
+                t1 = Thread(target = self.running)
+                t1.setDaemon(True)
+                t1.start()
+                self.__thread = t1
+            except:
+                print("Error: Unable to start thread by Scheduler")
+
+    def stop(self):
+        '''
+        Stop the scheduler thread after the task running now, the queued tasks wait for the next start
+        :return: void
+        '''
+        with self.__wakeup:
+            thread, self.__thread = self.__thread, None
+            self.__wakeup.notify()
+        if thread is not None and thread is not current_thread():
+            thread.join(1.0)
+
+    def running(self):
+        with self.__wakeup:
+            while self.__thread is current_thread():
+                if not self.__queue:
+                    self.__wakeup.wait()
+                    continue
+                deadline, count, task = self.__queue[0]
+                if not task.active:
+                    heapq.heappop(self.__queue)
+                    continue
+                now = time.time()
+                if deadline > now:
+                    self.__wakeup.wait(deadline - now)
+                    continue
+                heapq.heappop(self.__queue)
+                self.__wakeup.release()
+                try:
+                    overruns = task.overruns
+                    again = task.run(now)
+                    if task.overruns != overruns and self.overrun_handler is not None:
+                        self.overrun_handler(task)
+                finally:
+                    self.__wakeup.acquire()
+                if again:
+                    self.push(task)
+
+scheduler = Scheduler()
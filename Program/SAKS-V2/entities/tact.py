@@ -16,19 +16,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import RPi.GPIO as GPIO
-import time
-from threading import Thread
+from .gpio import GPIO
+from .scheduler import scheduler
 
 class Tact(object):
     '''
     Tact class
     '''
-    __pin = 0
-    __real_true = GPIO.HIGH
-    __status = False
-
-    __observers = []
+    __slots__ = ('__pin', '__real_true', '__status', '__observers', '__watch_task')
 
     def __init__(self, pin, real_true = GPIO.HIGH):
         '''
@@ -39,6 +34,8 @@ class Tact(object):
         '''
         self.__pin = pin
         self.__real_true = real_true
+        self.__observers = []
+        self.__watch_task = None
 
         if self.__real_true:
             self.__status = GPIO.input(self.__pin)
@@ -47,14 +44,6 @@ class Tact(object):
 
         GPIO.add_event_detect(pin, GPIO.BOTH, callback = self.make_event, bouncetime = 1)
 
-        try:
-            t1 = Thread(target = self.watching)
-            t1.setDaemon(True)
-            #t1.start()
-        except:
-            print("Error: Unable to start thread by Tact")
-
-
     #Stauts.
     @property
     def is_on(self):
@@ -87,7 +76,8 @@ class Tact(object):
         self.notify_observers(action)
 
     def make_event(self, channel):
-        self.notify_observers(self.__real_true if GPIO.input(self.__pin) else not self.__real_true)
+        if self.__observers:
+            self.notify_observers(self.__real_true if GPIO.input(self.__pin) else not self.__real_true)
         if self.__real_true:
             if self.__status != GPIO.input(self.__pin):
                 self.__status = GPIO.input(self.__pin)
@@ -97,27 +87,39 @@ class Tact(object):
                 self.__status = not GPIO.input(self.__pin)
                 #self.notify_observers(self.__real_true if not self.__status else not self.__real_true)
 
-    def watching(self):
+    def poll(self):
         if self.__real_true:
-            while True:
-                if GPIO.input(self.__pin) != self.__status:
-                    self.__status = GPIO.input(self.__pin)
-                    self.notify_observers(self.__real_true if self.__status else not self.__real_true)
-                    time.sleep(0.05)
+            if GPIO.input(self.__pin) != self.__status:
+                self.__status = GPIO.input(self.__pin)
+                self.notify_observers(self.__real_true if self.__status else not self.__real_true)
         else:
-            while True:
-                if GPIO.input(self.__pin) == self.__status:
-                    self.__status = not GPIO.input(self.__pin)
-                    self.notify_observers(self.__real_true if not self.__status else not self.__real_true)
-                    time.sleep(0.05)
+            if GPIO.input(self.__pin) == self.__status:
+                self.__status = not GPIO.input(self.__pin)
+                self.notify_observers(self.__real_true if not self.__status else not self.__real_true)
+
+    def watch(self, period = 0.05):
+        '''
+        Also poll the tact, for when the edge events are missed
+        :param period: seconds between the polls
+        :return: void
+        '''
+        self.unwatch()
+        self.__watch_task = scheduler.every(period, self.poll, name = 'tact_watch')
+
+    def unwatch(self):
+        '''
+        Stop polling the tact
+        :return: void
+        '''
+        if self.__watch_task is not None:
+            self.__watch_task.cancel()
+            self.__watch_task = None
 
 class TactRow(object):
     '''
     Class of tacts in row
     '''
-    __tacts = []
-    __pins = []
-    __real_true = GPIO.HIGH
+    __slots__ = ('__tacts', '__pins', '__real_true')
 
     def __init__(self, pins, real_true = GPIO.HIGH):
         '''
@@ -128,8 +130,7 @@ class TactRow(object):
         '''
         self.__pins = pins
         self.__real_true = real_true
-        for p in pins:
-            self.__tacts.append(Tact(p, real_true))
+        self.__tacts = [Tact(p, real_true) for p in pins]
 
     #Stauts.
     def is_on(self, index):
@@ -1,9 +1,11 @@
 #!/usr/bin/python
 
 import time
-import RPi.GPIO as GPIO
+from entities.gpio import GPIO
 from sakshat import SAKSHAT
 from sakspins import SAKSPins as PINS
+from entities import speed_of_sound
+from entities.scheduler import scheduler
 
 SAKS = SAKSHAT()
 GPIO_TRIGGER = PINS.UART_TXD
@@ -11,11 +13,15 @@ GPIO_ECHO = PINS.UART_RXD
 GPIO.setup(GPIO_TRIGGER, GPIO.OUT, initial = GPIO.LOW) # Ultrasonic Trigger
 GPIO.setup(GPIO_ECHO, GPIO.IN)                         # Ultrasonic Echo
 
+SAKS.ds18b20.start(60) # the speed of sound follows the temperature
+
 def get_distance():
   '''
   Get distance from HC-SR04 Ultrasonic Sensor
   :return: int, distance in cm
   '''
+  t = SAKS.ds18b20.reading[0]
+  sound_speed = 34300 if t is None else speed_of_sound(t)
   GPIO.output(GPIO_TRIGGER, GPIO.HIGH)
   time.sleep(0.00001)
   GPIO.output(GPIO_TRIGGER, GPIO.LOW)
@@ -25,12 +31,18 @@ def get_distance():
   stop = start = time.time()
   while GPIO.input(GPIO_ECHO) == GPIO.HIGH and stop - start < 0.01:
     stop = time.time()
-  return int((stop - start) * 34300 / 2) # sound speed is 34300 cm/s
+  return int((stop - start) * sound_speed / 2)
 
-while True:
-  d = get_distance()
-  if d < 50:
-    SAKS.buzzer.beep(0.01)
-  print d, 'cm'
-  time.sleep(0.5)
+try:
+  while True:
+    d = get_distance()
+    if d < 50:
+      SAKS.buzzer.beep(0.01)
+    print d, 'cm'
+    time.sleep(0.5)
+except KeyboardInterrupt:
+  print
+SAKS.ds18b20.stop()
+SAKS.buzzer.stop()
+scheduler.stop()
 
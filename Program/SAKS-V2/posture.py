@@ -0,0 +1,94 @@
+#!/usr/bin/python
+'''
+posture.py, by Wangs, 2017
+  Alpha-beta tracking of the head to desk distance for sitcat.py
+'''
+
+class PostureEstimator(object):
+    '''
+    Alpha-beta filter over the distance samples, O(1) time and space per sample
+    '''
+    def __init__(self, alpha = 0.5, beta = 0.1, max_gap = 2.0):
+        '''
+        :param alpha: how much of the distance residual is taken each sample
+        :param beta: how much of the velocity residual is taken each sample
+        :param max_gap: seconds without samples after which the track is dropped
+        '''
+        self.alpha = alpha
+        self.beta = beta
+        self.max_gap = max_gap
+        self.reset()
+
+    def reset(self):
+        '''
+        Forget the track, e.g. when the user has gone away
+        '''
+        self.time = None
+        self.distance = None
+        self.velocity = 0.0
+        self.alert_since = None
+
+    @property
+    def state(self):
+        '''
+        :return: tuple to checkpoint, see set_state()
+        '''
+        return (self.time, self.distance, self.velocity)
+
+    def set_state(self, state):
+        '''
+        Restore a checkpointed state, a track older than max_gap drops itself on the next update
+        :param state: tuple from state
+        '''
+        self.time, self.distance, self.velocity = state
+        self.alert_since = None
+
+    def update(self, t, d):
+        '''
+        Feed a sample
+        :param t: time of the sample
+        :param d: distance in cm
+        '''
+        if self.time is None or t - self.time > self.max_gap:
+            self.time, self.distance, self.velocity = t, float(d), 0.0
+            return
+        dt = t - self.time
+        if dt <= 0:
+            return
+        predicted = self.distance + self.velocity * dt
+        r = d - predicted
+        self.distance = predicted + self.alpha * r
+        self.velocity += self.beta * r / dt
+        self.time = t
+
+    def predict(self, lead):
+        '''
+        :param lead: seconds ahead of the last sample
+        :return: float, expected distance in cm, None if there is no track
+        '''
+        if self.distance is None:
+            return None
+        return self.distance + self.velocity * lead
+
+    def alert(self, t, limit, lead = 1.0, hold = 0.0):
+        '''
+        Tell whether the distance is below limit, or heading there within lead seconds,
+        and has been so for at least hold seconds
+        :param t: current time
+        :param limit: distance in cm
+        :param lead: seconds to look ahead, 0 to only alert once crossed
+        :param hold: seconds the condition must last, to trade latency for fewer false alerts
+        :return: bool
+        '''
+        if self.distance is None:
+            crossing = False
+        elif self.distance < limit:
+            crossing = True
+        else:
+            crossing = self.velocity < 0 and self.predict(lead) < limit
+        if not crossing:
+            self.alert_since = None
+            return False
+        if self.alert_since is None:
+            self.alert_since = t
+        return t - self.alert_since >= hold
@@ -20,54 +20,104 @@ __author__ = 'Spoony'
 __version__  = 'version 0.0.1'
 __license__  = 'Copyright (c) 2016 NXEZ.COM'
 
-import RPi.GPIO as GPIO
+import time
+from threading import RLock
+from entities.gpio import GPIO
+from entities.pinbank import bank
 from sakspins import SAKSPins as PINS
 import entities
 
+class lazy(object):
+    '''
+    Attribute built by the decorated method on first access, then kept on the instance
+    '''
+    __building = RLock()
+
+    def __init__(self, build):
+        self.build = build
+        self.name = build.__name__
+        self.__doc__ = build.__doc__
+
+    def __get__(self, obj, owner):
+        if obj is None:
+            return self
+        with self.__building:
+            if self.name in obj.__dict__: # built by another thread meanwhile
+                return obj.__dict__[self.name]
+            t = time.time()
+            value = self.build(obj)
+            obj.timings.append((self.name, time.time() - t))
+            obj.__dict__[self.name] = value
+        return value
+
 class SAKSHAT(object):
     '''
     SAKS HAT class, some useful function are declared.
+    The output devices are set up on first use, see timings for what that took
     '''
-    buzzer = None
-    ledrow = None
-    ds18b20 = None
-    digital_display = None
-    dip_switch = None
-    tactrow = None
 
     def saks_gpio_init(self):
         #print 'saks_gpio_init'
         GPIO.setwarnings(False)
-        GPIO.cleanup()
+        bank.cleanup()
         GPIO.setmode(GPIO.BCM)
 
-        GPIO.setup(PINS.BUZZER, GPIO.OUT)
-        GPIO.output(PINS.BUZZER, GPIO.HIGH)
+        bank.setup(PINS.BUZZER, GPIO.OUT)
+        bank.output(PINS.BUZZER, GPIO.HIGH)
 
         for p in [PINS.IC_TM1637_DI, PINS.IC_TM1637_CLK, PINS.IC_74HC595_DS, PINS.IC_74HC595_SHCP, PINS.IC_74HC595_STCP]:
-            GPIO.setup(p, GPIO.OUT)
-            GPIO.output(p, GPIO.LOW)
+            bank.setup(p, GPIO.OUT)
+            bank.output(p, GPIO.LOW)
 
         for p in [PINS.BUZZER, PINS.TACT_RIGHT, PINS.TACT_LEFT, PINS.DIP_SWITCH_1, PINS.DIP_SWITCH_2]:
-            GPIO.setup(p, GPIO.OUT)
-            GPIO.output(p, GPIO.HIGH)
+            bank.setup(p, GPIO.OUT)
+            bank.output(p, GPIO.HIGH)
 
         for p in [PINS.TACT_RIGHT, PINS.TACT_LEFT, PINS.DIP_SWITCH_1, PINS.DIP_SWITCH_2]:
-            GPIO.setup(p, GPIO.IN, pull_up_down = GPIO.PUD_UP)
+            bank.setup(p, GPIO.IN, pull_up_down = GPIO.PUD_UP)
 
     def __init__(self):
+        self.timings = []
+        t = time.time()
         self.saks_gpio_init()
-        self.buzzer = entities.Buzzer(PINS.BUZZER, GPIO.LOW)
-        self.ledrow = entities.Led74HC595({'ds': PINS.IC_74HC595_DS, 'shcp': PINS.IC_74HC595_SHCP, 'stcp': PINS.IC_74HC595_STCP}, GPIO.HIGH)
-        self.ds18b20 = entities.DS18B20(PINS.DS18B20)
-        self.digital_display = entities.DigitalDisplayTM1637({'di': PINS.IC_TM1637_DI, 'clk': PINS.IC_TM1637_CLK}, GPIO.HIGH)
+        self.timings.append(('saks_gpio_init', time.time() - t))
+
+        # the inputs are built now, the handlers get events without anyone touching them first
+        t = time.time()
         self.dip_switch = entities.DipSwitch2Bit([PINS.DIP_SWITCH_1, PINS.DIP_SWITCH_2], GPIO.LOW)
         self.dip_switch.register(self)
+        self.timings.append(('dip_switch', time.time() - t))
+
+        t = time.time()
         self.tactrow = entities.TactRow([PINS.TACT_LEFT, PINS.TACT_RIGHT], GPIO.LOW)
-        for t in self.tactrow.items:
-            t.register(self)
+        for tact in self.tactrow.items:
+            tact.register(self)
+        self.timings.append(('tactrow', time.time() - t))
+
+    @lazy
+    def buzzer(self):
+        return entities.Buzzer(PINS.BUZZER, GPIO.LOW)
+
+    @lazy
+    def ledrow(self):
+        return entities.Led74HC595({'ds': PINS.IC_74HC595_DS, 'shcp': PINS.IC_74HC595_SHCP, 'stcp': PINS.IC_74HC595_STCP}, GPIO.HIGH)
+
+    @lazy
+    def ds18b20(self):
+        return entities.DS18B20(PINS.DS18B20)
+
+    @lazy
+    def digital_display(self):
+        digital_display = entities.DigitalDisplayTM1637({'di': PINS.IC_TM1637_DI, 'clk': PINS.IC_TM1637_CLK}, GPIO.HIGH)
+        digital_display.ic.calibrate()
+        return digital_display
 
-        #print('self.dip_switch.register(self)')
+    def startup_report(self):
+        '''
+        Tell where the time setting up the board went
+        :return: string, e.g. 'saks_gpio_init 0.4ms, digital_display 1.2ms'
+        '''
+        return ', '.join(['%s %.1fms' % (name, t * 1000) for name, t in self.timings])
 
     dip_switch_status_changed_handler = None
     def on_dip_switch_2bit_status_changed(self, status):
@@ -5,33 +5,54 @@ sitcat.py, by Wangs, May~Oct 2017
 '''
 
 import os, time, pickle, signal
-import RPi.GPIO as GPIO
+from threading import Thread, Event, Lock
+STARTED = time.time()
+from entities.gpio import GPIO
 from sakshat import SAKSHAT
 from sakspins import SAKSPins as PINS
+from entities import HCSR04, RangingService, EventQueue
+from entities.scheduler import scheduler
+from posture import PostureEstimator
+
+RANGING_MODE = HCSR04.MODE_EDGE # or HCSR04.MODE_POLL to busy-poll the echo pin
+RANGING_RATE = 10               # samples per second
+RANGING_BURST = 3               # pings per sample, the median of them is taken
+MIN_CONFIDENCE = 0.5            # samples with fewer pings agreeing are not judged
+ALERT_LEAD = 1.0                # seconds ahead to beep when heading below safe_dist
+ALERT_HOLD = 0.5                # seconds below safe_dist (or heading there) before beeping
+FAR_AWAY = 30                   # cm beyond safe_dist that counts as away from the desk
+TEMPERATURE_PERIOD = 60         # seconds between the temperature readings the sound speed follows
+TICK_PERIOD = 0.5               # seconds between the rounds of the main loop
+EVENT_PERIOD = 0.02             # seconds between the looks at the key events
+ALERT = (0.01, 0, 1)            # buzzer patterns, (on seconds, off seconds, repeat times)
+CLICK = (0.01, 0.05, 1)
+BEEP_ON = (0.01, 0.05, 5)
 
 SAKS = SAKSHAT()
+events = EventQueue() # the keys only post here, the handlers run from the scheduler
 
-def get_distance():
+def get_sample():
   '''
-  Get distance from HC-SR04
-  :return: int, distance in cm
+  Get the newest sample of the ranging service, which is the only user of the HC-SR04, without waiting
+  :return: (distance in cm or None if no echo, confidence), confidence 0 before the first sample
   '''
-  GPIO.output(PINS.UART_TXD, GPIO.HIGH)
-  time.sleep(0.1)
-  GPIO.output(PINS.UART_TXD, GPIO.LOW)
-  stop = start = time.time()
-  while GPIO.input(PINS.UART_RXD) == GPIO.LOW and stop - start < 0.1:
-    stop = time.time()
-  stop = start = time.time()
-  while GPIO.input(PINS.UART_RXD) == GPIO.HIGH and stop - start < 0.1:
-    stop = time.time()
-  return int((stop - start) * 34300 / 2) # sound speed is 34300 cm/s
+  sample = ranging.latest
+  if sample is None:
+    return None, 0.0
+  return sample.distance, sample.confidence
 
-def buzz():
+def set_range():
   '''
-  Buzz for 0.01s
+  Only wait for echoes that matter to the current mode, calibrating needs the full range
   '''
-  SAKS.buzzer.beep(0.01)
+  sonar.set_max_range(HCSR04.MAX_RANGE if mode == 1 else safe_dist + FAR_AWAY + 10)
+
+def buzz(pattern = ALERT, preempt = False):
+  '''
+  Buzz a pattern, returns at once. The same pattern is not queued twice, so alerts do not pile up
+  :param preempt: cut what is playing short, for the keys
+  '''
+  SAKS.buzzer.play(pattern, preempt = preempt)
 
 def led(status):
   '''
@@ -53,6 +74,7 @@ def led(status):
 
 mode, beep, safe_dist, show_days = 0, False, 50, 0
 counts = [ [0, 0] for _ in range(8) ]
+posture = PostureEstimator()
 
 def save():
   '''
@@ -60,9 +82,28 @@ def save():
   '''
   global mode, beep, safe_dist, show_days, counts
   yday = time.localtime().tm_yday
-  pickle.dump((mode, beep, safe_dist, show_days, yday, counts), file('sitcat.pickle', 'w'))
+  with save_lock:
+    pickle.dump((mode, beep, safe_dist, show_days, yday, counts, posture.state), file('sitcat.pickle', 'w'))
   print 'Save:', mode, beep, safe_dist, show_days, yday, counts[:4]
 
+save_needed = Event()
+save_lock = Lock()
+
+def save_later():
+  '''
+  Have the saver thread save the settings, returns at once so the scheduler thread does not wait for the disk
+  '''
+  save_needed.set()
+
+def saver_worker():
+  '''
+  Saver thread, saves the settings when asked to
+  '''
+  while True:
+    save_needed.wait()
+    save_needed.clear()
+    save()
+
 def load():
   '''
   Load the settings
@@ -70,133 +111,195 @@ def load():
   global mode, beep, safe_dist, show_days, counts
   yday = 0
   try:
-    mode, beep, safe_dist, show_days, yday, c = pickle.load(file('sitcat.pickle'))
+    data = pickle.load(file('sitcat.pickle'))
+    mode, beep, safe_dist, show_days, yday, c = data[:6]
     if yday == time.localtime().tm_yday:
       counts = c
+      if len(data) > 6:
+        posture.set_state(data[6])
   except:
     pass
   print 'Load:', mode, beep, safe_dist, show_days, yday, counts[:4]
 
-def on_right_key(*args):
+def calibrate(since):
+  '''
+  Take the first distance measured after since as the safe distance. Until there is one
+  it checks back every EVENT_PERIOD instead of waiting, for a second at most, then keeps the old one
+  :param since: float, time of the key press
   '''
-  Called while right key pressed
+  global safe_dist, show_safe
+  sample = ranging.latest
+  fresh = sample is not None and sample.time >= since
+  if not fresh and time.time() - since < 1.0:
+    scheduler.after(EVENT_PERIOD, calibrate, (since,), name = 'calibrate')
+    return
+  show_safe = 3
+  if fresh:
+    safe_dist = sample.distance or safe_dist
+    save_later()
+
+def on_right_key(t):
+  '''
+  Handles the right key events
+  :param t: float, time of the key press
   '''
   global mode, show_safe
-  buzz()
+  buzz(CLICK, True)
   mode = (mode + 1) % 3
   show_safe = 3
-  save()
+  set_range()
+  save_later()
 
-def on_left_key(*args):
+def on_left_key(t):
   '''
-  Called while left key pressed
+  Handles the left key events
+  :param t: float, time of the key press
   '''
-  global beep, safe_dist, show_safe, show_days
-  buzz()
+  global beep, show_days
+  buzz(CLICK, True)
   if mode == 0:
     beep = not beep
     if beep:
-      for i in range(5):
-        buzz()
+      buzz(BEEP_ON)
   elif mode == 1:
-    safe_dist = get_distance()
-    show_safe = 3
+    calibrate(t) # saves once it has a distance
+    return
   else:
     show_days = {0:1, 1:3, 3:7, 7:0}[show_days]
-  save()
+  save_later()
 
 def init():
   '''
   Initialize the program
   '''
-  GPIO.setup(PINS.UART_TXD, GPIO.OUT, initial = GPIO.LOW)          # Ultrasonic Trigger
-  GPIO.setup(PINS.UART_RXD, GPIO.IN, pull_up_down = GPIO.PUD_DOWN) # Ultrasonic Echo
+  global sonar, ranging
+  sonar = HCSR04({'trig': PINS.UART_TXD, 'echo': PINS.UART_RXD}, RANGING_MODE) # Ultrasonic
+  SAKS.ds18b20.start(TEMPERATURE_PERIOD)
+  ranging = RangingService(sonar, RANGING_RATE, burst = RANGING_BURST, thermometer = SAKS.ds18b20)
+  ranging.start()
+  events.on('left', on_left_key)
+  events.on('right', on_right_key)
+  events.start(EVENT_PERIOD)
   GPIO.remove_event_detect(PINS.TACT_LEFT)
-  GPIO.add_event_detect(PINS.TACT_LEFT, GPIO.FALLING, callback = on_left_key, bouncetime = 500)
-  signal.signal(signal.SIGUSR1, on_left_key)                  # SIGUSR1 as left key
+  GPIO.add_event_detect(PINS.TACT_LEFT, GPIO.FALLING, callback = events.poster('left'), bouncetime = 500)
+  signal.signal(signal.SIGUSR1, events.poster('left'))        # SIGUSR1 as left key
   GPIO.remove_event_detect(PINS.TACT_RIGHT)
-  GPIO.add_event_detect(PINS.TACT_RIGHT, GPIO.FALLING, callback = on_right_key, bouncetime = 500)
-  signal.signal(signal.SIGUSR2, on_right_key)                 # SIGUSR2 as right key
+  GPIO.add_event_detect(PINS.TACT_RIGHT, GPIO.FALLING, callback = events.poster('right'), bouncetime = 500)
+  signal.signal(signal.SIGUSR2, events.poster('right'))       # SIGUSR2 as right key
+  try:
+    t4 = Thread(target = saver_worker)
+    t4.setDaemon(True)
+    t4.start()
+  except:
+    print "Error: Unable to start thread by saver"
+  print 'Started in %.1fms: %s' % ((time.time() - STARTED) * 1000, SAKS.startup_report())
 
 def done():
   '''
   Stop the program
   '''
+  ranging.stop()
+  SAKS.ds18b20.stop()
+  SAKS.buzzer.stop()
   SAKS.digital_display.off()
   SAKS.ledrow.off()
+  scheduler.stop()
+
+def start():
+  '''
+  Reset the state of the main loop
+  '''
+  global relax_time, yday, show_safe, far_away, h, seq
+  relax_time = time.time()
+  yday = time.localtime().tm_yday
+  show_safe = 3
+  far_away = 0
+  h = 0
+  seq = -1
+  set_range()
+
+def tick():
+  '''
+  One round of the main loop: judge the posture and update the display
+  :return: float, time the round started
+  '''
+  global relax_time, yday, show_safe, far_away, h, seq
+  t = time.time()
+  if time.localtime(t).tm_yday != yday: # new day
+    yday = time.localtime(t).tm_yday
+    counts.insert(0, [0, 0])
+    counts.pop()
+    save_later()
+  d, confidence = get_sample()
+  for sample in ranging.ring.since(seq): # track every sample, not just one per tick
+    seq = sample.seq
+    if sample.distance is not None and sample.confidence >= MIN_CONFIDENCE:
+      posture.update(sample.time, sample.distance)
+  if confidence < MIN_CONFIDENCE: # too noisy to tell, judge the next one
+    pass
+  elif d is not None and d <= safe_dist + FAR_AWAY: # None is no echo, nobody there
+    far_away /= 10
+    counts[0][1] += 1
+    if d >= safe_dist:
+      counts[0][0] += 1
+      h = 0
+    else:
+      h += 1
+    if beep and posture.alert(t, safe_dist, ALERT_LEAD, ALERT_HOLD):
+      buzz()
+  else:
+    far_away += 1
+    h = -1
+    posture.reset()
+    relax_time += 2.5
+    if relax_time > t or t - relax_time >= 60 * 60:
+      relax_time = t
+  led('flashing' if t - relax_time >= 20 * 60 else 'off') # relax after 20 minutes studying ...
+  if mode == 0:
+    s = '%4d' % (d - safe_dist) if h > 1 and d is not None else '    .' if h < 0 else ' .   '
+  elif mode == 1:
+    if show_safe > 0:
+      s = '=%3d' % safe_dist
+      show_safe -= 1
+    else:
+      s = '%4d' % d if d is not None else '----'
+  else:
+    if show_days == 0:
+      score = counts[0][0] * 100 / (1 + counts[0][1])
+      s = 'C%3d' % score
+    else:
+      c0, c1 = 0, 1
+      for i, j in counts[1 : show_days + 1]:
+        c0 += i
+        c1 += j
+      score = c0 * 100 / c1
+      s = '%d%3d' % (show_days, score)
+  if far_away > 120:
+    s = '    '
+  SAKS.digital_display.show(s)
+  print '    %s [%-4s] %3scm %ds %s    \r' % (time.ctime(), s, d if d is not None else '---', t - relax_time, counts[0]),
+  os.sys.stdout.flush()
+  return t
 
 def run():
   '''
   Main loop
   '''
-  global show_safe
+  start()
+  task = scheduler.every(TICK_PERIOD, tick, name = 'tick')
   try:
-    relax_time = time.time()
-    yday = time.localtime().tm_yday
-    show_safe = 3
-    far_away = 0
-    h = 0
-    while True:
-      t = time.time()
-      if time.localtime(t).tm_yday != yday: # new day
-        yday = time.localtime(t).tm_yday
-        counts.insert(0, [0, 0])
-        counts.pop()
-        save()
-      d = get_distance()
-      if d < 5:
-        d = get_distance()
-      if d <= safe_dist + 30:
-        far_away /= 10
-        counts[0][1] += 1
-        if d >= safe_dist:
-          counts[0][0] += 1
-          h = 0
-        else:
-          h += 1
-          if beep and h > 1:
-            buzz()
-      else:
-        far_away += 1
-        h = -1
-        relax_time += 2.5
-        if relax_time > t or t - relax_time >= 60 * 60:
-          relax_time = t
-      led('flashing' if t - relax_time >= 20 * 60 else 'off') # relax after 20 minutes studying ...
-      if mode == 0:
-        s = '%4d' % (d - safe_dist) if h > 1 else '    .' if h < 0 else ' .   '
-      elif mode == 1:
-        if show_safe > 0:
-          s = '=%3d' % safe_dist
-          show_safe -= 1
-        else:
-          s = '%4d' % d
-      else:
-        if show_days == 0:
-          score = counts[0][0] * 100 / (1 + counts[0][1])
-          s = 'C%3d' % score
-        else:
-          c0, c1 = 0, 1
-          for i, j in counts[1 : show_days + 1]:
-            c0 += i
-            c1 += j
-          score = c0 * 100 / c1
-          s = '%d%3d' % (show_days, score)
-      if far_away > 120:
-        s = '    '
-      SAKS.digital_display.show(s)
-      print '    %s [%-4s] %3dcm %ds %s    \r' % (time.ctime(), s, d, t - relax_time, counts[0]),
-      os.sys.stdout.flush()
-      t += 0.5 - time.time()
-      if t > 0:
-        time.sleep(t)
+    while task.active: # the scheduler runs the loop, this thread only waits for Ctrl-C
+      time.sleep(1)
   except KeyboardInterrupt:
     print
+  task.cancel()
+  events.stop()
+  print 'Scheduler:', scheduler.report()
+  print 'Events:', events.report()
 
-init()
-load()
-run()
-save()
-done()
-
-
+if __name__ == '__main__':
+  init()
+  load()
+  run()
+  save()
+  done()
@@ -1,18 +1,23 @@
 #!/usr/bin/python
 
-import time
-import RPi.GPIO as GPIO
+import os, sys, time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'SAKS-V2'))
+os.environ.setdefault('SAKS_SIM_BOARD', 'saks-v1') # wiring for the simulated board off the Pi
+from entities.gpio import GPIO
+from entities import DS18B20, speed_of_sound
 
 BUZZER       = 11
 GPIO_ECHO    = 14
 GPIO_TRIGGER = 15
-SOUND_SPEED  = 34029
+SOUND_SPEED  = 34029 # until the DS18B20 has been read
   
 def get_distance():
   '''
   Get distance from HC-SR04 Ultrasonic Sensor
   :return: int, distance in cm
   '''
+  t = thermometer.reading[0]
+  sound_speed = SOUND_SPEED if t is None else speed_of_sound(t)
   GPIO.output(GPIO_TRIGGER, GPIO.HIGH)
   time.sleep(0.00001)
   GPIO.output(GPIO_TRIGGER, GPIO.LOW)
@@ -22,7 +27,7 @@ def get_distance():
   stop = start = time.time()
   while GPIO.input(GPIO_ECHO) == GPIO.HIGH and stop - start < 0.1:
     stop = time.time()
-  return int((stop - start) * SOUND_SPEED / 2)
+  return int((stop - start) * sound_speed / 2)
 
 def buzz():
   '''
@@ -36,11 +41,17 @@ GPIO.setmode(GPIO.BCM)
 GPIO.setup(GPIO_TRIGGER, GPIO.OUT, initial = GPIO.LOW)       # Ultrasonic Trigger
 GPIO.setup(GPIO_ECHO, GPIO.IN, pull_up_down = GPIO.PUD_DOWN) # Ultrasonic Echo
 GPIO.setup(BUZZER, GPIO.OUT, initial = GPIO.HIGH)            # Buzzer 
+thermometer = DS18B20()
+thermometer.start(60)                                        # speed of sound follows the temperature
 
-while True:
-  d = get_distance()
-  if d < 50:
-    buzz()
-  print d, 'cm'
-  time.sleep(0.5)
+try:
+  while True:
+    d = get_distance()
+    if d < 50:
+      buzz()
+    print d, 'cm'
+    time.sleep(0.5)
+except KeyboardInterrupt:
+  print
+thermometer.stop()
 
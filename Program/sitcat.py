@@ -5,9 +5,31 @@ sitcat.py, by Wangs, May~June 2017
   Ultrasonic, DigitalDisplay, Temperature functions are written by Bob Wang
 '''
 
-import os, glob, time, pickle, signal, re
-from threading import Thread
-import RPi.GPIO as GPIO
+import os, sys, glob, time, pickle, signal
+from threading import Thread, Event, Lock
+from itertools import permutations
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'SAKS-V2'))
+os.environ.setdefault('SAKS_SIM_BOARD', 'saks-v1') # wiring for the simulated board off the Pi
+from entities import gpio
+from entities.gpio import GPIO
+from entities.glyphs import compile_frame
+from entities.pinbank import bank
+from entities.scheduler import scheduler
+from entities.buzzer import Buzzer
+from entities.events import EventQueue
+from entities.hcsr04 import speed_of_sound
+from posture import PostureEstimator
+
+RANGING_MODE = 'edge' # 'edge' for echo edge events, 'poll' to busy-poll the echo pin
+RANGING_RATE = 10     # pings per second
+TEMPERATURE_PERIOD = 60 # seconds between the temperature readings the speed of sound follows
+TICK_PERIOD = 0.5     # seconds between the rounds of the main loop
+EVENT_PERIOD = 0.02   # seconds between the looks at the key events
+ALERT_LEAD = 1.0      # seconds ahead to beep when heading below safe_dist
+ALERT_HOLD = 0.5      # seconds below safe_dist (or heading there) before beeping
+ALERT = (0.01, 0, 1)  # buzzer patterns, (on seconds, off seconds, repeat times)
+CLICK = (0.01, 0.05, 1)
+BEEP_ON = (0.01, 0.05, 5)
 
 class PINS(object):
     '''
@@ -53,73 +75,116 @@ class PINS(object):
     )
 
 class DigitalDisplay(object):
+    DIGIT_PERIOD = 0.005 # seconds each digit is lit
     __pins = {'seg': PINS.DIGITAL_DISPLAY, 'sel': PINS.DIGITAL_DISPLAY_SELECT}
-    __number_code = {'0':0x3f, '1':0x06, '2':0x5b, '3':0x4f, '4':0x66, '5':0x6d, '6':0x7d, 
-                     '7':0x07, '8':0x7f, '9':0x6f, '-':0x40, '_':0x08, '=':0x48, ' ':0x00,
-                     'A':0x77, 'B':0x7c, 'C':0x39, 'D':0x5e, 'E':0x79, 'F':0x71}
-    __pin_stat = {}
-    __numbers = ''
+    __slots__ = ('__numbers', '__shown', '__steps', '__next', '__task')
 
-    def __init__(self):
+    def __init__(self, start = True):
         for p in self.__pins['seg'] + self.__pins['sel']:
-            GPIO.setup(p, GPIO.OUT)
-            self.__pin_stat[p] = True
-            self.set_pin(p, False)
-        self.__pattern = re.compile(r'[-_=A-F0-9 #]\.?')
-        try:
-            t1 = Thread(target = self.flush_4bit)
-            t1.setDaemon(True)
-            t1.start()
-        except:
-            print "Error: Unable to start thread by DigitalDisplay"
+            bank.setup(p, GPIO.OUT, initial = GPIO.HIGH)
+        self.__numbers = ''
+        self.__shown = ''
+        self.__steps = []
+        self.__next = 0
+        self.__task = None
+        if start: # else refresh() is called by the owner
+            self.__task = scheduler.every(self.DIGIT_PERIOD, self.step, name = 'display')
+
+    def stop(self):
+        '''
+        Stop multiplexing, the pins keep their levels
+        '''
+        if self.__task is not None:
+            self.__task.cancel()
+            self.__task = None
 
     def show(self, str):
         self.__numbers = str
 
-    def set_pin(self, pin, v):
-        if v != self.__pin_stat[pin]:
-            self.__pin_stat[pin] = v
-            GPIO.output(pin, GPIO.LOW if v else GPIO.HIGH)
+    def digit_state(self, sel, n):
+        '''
+        Pin states lighting digit sel with segments n, True is lit
+        '''
+        state = {}
+        for i in range(8):
+            state[self.__pins['seg'][i]] = (n & (1 << i)) != 0
+        for k in range(len(self.__pins['sel'])):
+            state[self.__pins['sel'][k]] = k == sel
+        return state
+
+    def pin_state(self):
+        '''
+        Pin states driven now, from the pin bank
+        '''
+        state = {}
+        for p in self.__pins['seg'] + self.__pins['sel']:
+            state[p] = bank.level(p) == GPIO.LOW
+        return state
+
+    def transition(self, state, target):
+        '''
+        Pin writes taking the pins from state to target, as (pins, levels) for bank.output_many.
+        Selects go off first and on last, so no digit ever shows the segments of another
+        '''
+        sel = self.__pins['sel']
+        writes = [(p, GPIO.HIGH) for p in sel if state[p] and not target[p]]
+        writes += [(p, GPIO.LOW if target[p] else GPIO.HIGH) for p in self.__pins['seg'] if state[p] != target[p]]
+        writes += [(p, GPIO.LOW) for p in sel if target[p] and not state[p]]
+        return [w[0] for w in writes], [w[1] for w in writes]
+
+    def plan(self, frame):
+        '''
+        Plan the multiplexing of a frame, blank digits are skipped and the others are
+        lit in the cyclic order that toggles the fewest segments
+        :return: (pin writes to the first digit from the pins now, pin writes of each digit in turn)
+        '''
+        lit = [i for i in range(len(frame)) if frame[i]]
+        if not lit:
+            target = self.digit_state(None, 0)
+            return self.transition(self.pin_state(), target), []
+        def toggles(order):
+            return sum(bin(frame[a] ^ frame[b]).count('1') for a, b in zip(order, order[1:] + order[:1]))
+        order = min([lit[:1] + list(o) for o in permutations(lit[1:])], key = toggles)
+        states = [self.digit_state(i, frame[i]) for i in order]
+        steps = [self.transition(states[k - 1], states[k]) for k in range(len(states))]
+        return self.transition(self.pin_state(), states[-1]), steps
+
+    def replan(self):
+        '''
+        Plan the frame showing if it changed, and go to its first digit
+        :return: True if it changed
+        '''
+        if self.__shown == self.__numbers:
+            return False
+        self.__shown = self.__numbers
+        entry, self.__steps = self.plan(compile_frame(self.__shown))
+        self.__next = 0
+        bank.output_many(*entry)
+        return True
 
-    def flush_bit(self, sel, num, dp):
-        sel_pin = self.__pins['sel'][sel]
-        if not num in self.__number_code:
-            self.set_pin(sel_pin, False)
+    def step(self):
+        '''
+        Light the next digit of the plan, the scheduler calls this every DIGIT_PERIOD
+        '''
+        if self.replan(): # the entry lit a digit already
             return
-        n = self.__number_code[num] | (0x80 if dp else 0x00)
-        j = True
-        for i in range(8):
-            pin = self.__pins['seg'][i]
-            v = ((n & (1 << i)) != 0)
-            if v != self.__pin_stat[pin]:
-                if j:
-                    for k in self.__pins['sel']:
-                        self.set_pin(k, False)
-                    j = False
-                self.set_pin(pin, v)
-        self.set_pin(sel_pin, True)
-
-    def flush_4bit(self):
-        numbers = ''
-        digits = []
-        try:
-            while True:
-                if numbers != self.__numbers:
-                    numbers = self.__numbers
-                    matches = self.__pattern.findall(numbers)
-                    digits = []
-                    for i in range(len(matches)):
-                        digits.append((matches[i].replace('.',''), matches[i].count('.') > 0))
-                if digits:
-                    for i in range(min(4, len(digits))):
-                        self.flush_bit(i, *digits[i])
-                        time.sleep(0.005)
-                else:
-                    for pin in self.__pins['sel']:
-                        self.set_pin(pin, False)
-                    time.sleep(0.02)
-        except:
-            pass
+        steps = self.__steps
+        if steps:
+            bank.output_many(*steps[self.__next % len(steps)])
+            self.__next += 1
+
+    def refresh(self):
+        '''
+        Multiplex the 4 digits once, replaying the plan of the frame
+        '''
+        self.replan()
+        steps = self.__steps
+        if steps:
+            for pins, levels in steps:
+                bank.output_many(pins, levels)
+                time.sleep(self.DIGIT_PERIOD)
+        else:
+            time.sleep(0.02)
 
 def get_temperature():
   '''
@@ -127,31 +192,121 @@ def get_temperature():
   :return: float, Celsius temperature
   '''
   try:
-    return int(file(glob.glob('/sys/bus/w1/devices/28-*/w1_slave')[0]).read()[-6 : -1]) / 1000.0 - 5
+    return int(file(glob.glob(gpio.W1_DEVICES_DIR + '28-*/w1_slave')[0]).read()[-6 : -1]) / 1000.0 - 5
   except:
     return 27.0
 
-def get_distance():
+def temperature_worker():
   '''
-  Get distance from HC-SR04
-  :return: int, distance in cm
+  Temperature thread, keeps sound_speed following the temperature, the ranging thread only reads it
+  '''
+  global sound_speed
+  while True:
+    time.sleep(TEMPERATURE_PERIOD)
+    sound_speed = speed_of_sound(get_temperature())
+
+echo_edges = [None, None]
+echo_done = Event()
+
+def on_echo_edge(channel):
+  '''
+  Called on every edge of the echo pin, records the rising and then the falling edge time.
+  The pin level tells which edge it is, a late falling edge of the last echo is not a rise
+  '''
+  t = time.time()
+  if GPIO.input(channel) == GPIO.HIGH:
+    if echo_edges[1] is None:
+      echo_edges[0] = t
+  elif echo_edges[0] is not None and echo_edges[1] is None:
+    echo_edges[1] = t
+    echo_done.set()
+
+def get_echo_edge():
   '''
-  GPIO.output(PINS.GPIO_TRIGGER, GPIO.HIGH)
+  Measure the echo pulse from the edge timestamps, sleeping until the falling edge
+  :return: float, echo pulse width in seconds
+  '''
+  echo_edges[0] = echo_edges[1] = None
+  echo_done.clear()
+  bank.output(PINS.GPIO_TRIGGER, GPIO.HIGH)
+  time.sleep(0.00001)
+  bank.output(PINS.GPIO_TRIGGER, GPIO.LOW)
+  deadline = time.time() + 0.02
+  while not echo_done.is_set() and time.time() < deadline: # Event.wait(timeout) wakes up late
+    time.sleep(0.0002)
+  rise, fall = echo_edges
+  if rise is None:
+    return 0.0
+  if fall is None:
+    return time.time() - rise
+  return fall - rise
+
+def get_echo_poll():
+  '''
+  Measure the echo pulse by busy-polling the echo pin
+  :return: float, echo pulse width in seconds
+  '''
+  bank.output(PINS.GPIO_TRIGGER, GPIO.HIGH)
   time.sleep(0.00001)
-  GPIO.output(PINS.GPIO_TRIGGER, GPIO.LOW)
+  bank.output(PINS.GPIO_TRIGGER, GPIO.LOW)
   stop = start = time.time()
   while GPIO.input(PINS.GPIO_ECHO) == GPIO.LOW and stop - start < 0.01:
     stop = time.time()
   stop = start = time.time()
   while GPIO.input(PINS.GPIO_ECHO) == GPIO.HIGH and stop - start < 0.01:
     stop = time.time()
-  return int((stop - start) * sound_speed / 2)
+  return stop - start
+
+def measure_distance(speed):
+  '''
+  Measure distance with HC-SR04, only called by the ranging thread
+  :param speed: speed of sound in cm/s
+  :return: int, distance in cm
+  '''
+  if RANGING_MODE == 'edge':
+    width = get_echo_edge()
+  else:
+    width = get_echo_poll()
+  return int(width * speed / 2)
+
+samples = [None] * 16 # ring of (seq, time, distance, sound speed), written by the ranging thread only
+sample_count = 0
+
+def ranging_worker():
+  '''
+  Ranging thread, owns the HC-SR04 and publishes samples at RANGING_RATE
+  '''
+  global sample_count
+  next_ping = time.time()
+  while True:
+    v = sound_speed # taken once, the temperature thread may replace it meanwhile
+    d = measure_distance(v)
+    n = sample_count
+    samples[n % len(samples)] = (n, time.time(), d, v)
+    sample_count = n + 1
+    next_ping += 1.0 / RANGING_RATE
+    t = next_ping - time.time()
+    if t > 0:
+      time.sleep(t)
+    else:
+      next_ping = time.time()
+
+def get_distance():
+  '''
+  Get distance from the newest sample of the ranging thread, without waiting
+  :return: int, distance in cm, None before the first sample
+  '''
+  n = sample_count
+  if n == 0:
+    return None
+  return samples[(n - 1) % len(samples)][2]
 
 #----------------------------------------------------------
 
 
 mode, beep, safe_dist, show_days = 0, False, 50, 0
 counts = [ [0, 0] for _ in range(8) ]
+posture = PostureEstimator()
 
 def save():
   '''
@@ -159,9 +314,28 @@ def save():
   '''
   global mode, beep, safe_dist, show_days, counts
   yday = time.localtime().tm_yday
-  pickle.dump((mode, beep, safe_dist, show_days, yday, counts), file('sitcat.pickle', 'w'))
+  with save_lock:
+    pickle.dump((mode, beep, safe_dist, show_days, yday, counts, posture.state), file('sitcat.pickle', 'w'))
   print 'Save:', mode, beep, safe_dist, show_days, yday, counts[:4]
 
+save_needed = Event()
+save_lock = Lock()
+
+def save_later():
+  '''
+  Have the saver thread save the settings, returns at once so the scheduler thread does not wait for the disk
+  '''
+  save_needed.set()
+
+def saver_worker():
+  '''
+  Saver thread, saves the settings when asked to
+  '''
+  while True:
+    save_needed.wait()
+    save_needed.clear()
+    save()
+
 def load():
   '''
   Load the settings
@@ -169,20 +343,22 @@ def load():
   global mode, beep, safe_dist, show_days, counts
   yday = 0
   try:
-    mode, beep, safe_dist, show_days, yday, c = pickle.load(file('sitcat.pickle'))
+    data = pickle.load(file('sitcat.pickle'))
+    mode, beep, safe_dist, show_days, yday, c = data[:6]
     if yday == time.localtime().tm_yday:
       counts = c
+      if len(data) > 6:
+        posture.set_state(data[6])
   except:
     pass
   print 'Load:', mode, beep, safe_dist, show_days, yday, counts[:4]
 
-def buzz():
+def buzz(pattern = ALERT, preempt = False):
   '''
-  Buzz for 0.01s
+  Buzz a pattern, returns at once. The same pattern is not queued twice, so alerts do not pile up
+  :param preempt: cut what is playing short, for the keys
   '''
-  GPIO.output(PINS.BUZZER, GPIO.LOW)
-  time.sleep(0.01)
-  GPIO.output(PINS.BUZZER, GPIO.HIGH)
+  buzzer.play(pattern, preempt = preempt)
 
 def led(status):
   '''
@@ -195,144 +371,221 @@ def led(status):
     v = GPIO.HIGH
   else:
     v = int(time.time()) % 2
-  GPIO.output(PINS.LED_RED, v)
-  GPIO.output(PINS.LED_YELLOW, v)
+  bank.output_many((PINS.LED_RED, PINS.LED_YELLOW), v)
+
+events = EventQueue() # the keys only post here, the handlers run from the scheduler
 
-def on_right_key(*args):
+def calibrate(since):
+  '''
+  Take the first distance measured after since as the safe distance. Until there is one
+  it checks back every EVENT_PERIOD instead of waiting, for a second at most, then keeps the old one
+  :param since: float, time of the key press
   '''
-  Called while right key pressed
+  global safe_dist, show_safe
+  n = sample_count
+  fresh = n > 0 and samples[(n - 1) % len(samples)][1] >= since
+  if not fresh and time.time() - since < 1.0:
+    scheduler.after(EVENT_PERIOD, calibrate, (since,), name = 'calibrate')
+    return
+  show_safe = 3
+  if fresh:
+    safe_dist = samples[(n - 1) % len(samples)][2]
+    save_later()
+
+def on_right_key(t):
+  '''
+  Handles the right key events
+  :param t: float, time of the key press
   '''
   global mode, show_safe
-  buzz()
+  buzz(CLICK, True)
   mode = (mode + 1) % 3
   show_safe = 3
-  save()
+  save_later()
 
-def on_left_key(*args):
+def on_left_key(t):
   '''
-  Called while left key pressed
+  Handles the left key events
+  :param t: float, time of the key press
   '''
-  global beep, safe_dist, show_safe, show_days
-  buzz()
+  global beep, show_days
+  buzz(CLICK, True)
   if mode == 0:
     beep = not beep
     if beep:
-      for i in range(5):
-        buzz()
+      buzz(BEEP_ON)
   elif mode == 1:
-    safe_dist = get_distance()
-    show_safe = 3
+    calibrate(t) # saves once it has a distance
+    return
   else:
     show_days = {0:1, 1:3, 3:7, 7:0}[show_days]
-  save()
+  save_later()
 
 def init():
   '''
   Initialize the program
   '''
-  global display, sound_speed
+  global display, buzzer, sound_speed, RANGING_MODE
   GPIO.setwarnings(False)
-  GPIO.cleanup()
+  bank.cleanup()
   GPIO.setmode(GPIO.BCM)
-  GPIO.setup(PINS.GPIO_TRIGGER, GPIO.OUT, initial = GPIO.LOW)      # Ultrasonic Trigger
-  GPIO.setup(PINS.GPIO_ECHO, GPIO.IN, pull_up_down = GPIO.PUD_DOWN)# Ultrasonic Echo
-  GPIO.setup(PINS.BUZZER, GPIO.OUT, initial = GPIO.HIGH)           # Buzzer 
-  GPIO.setup(PINS.LED_RED, GPIO.OUT, initial = GPIO.HIGH)          # Red LED
-  GPIO.setup(PINS.LED_YELLOW, GPIO.OUT, initial = GPIO.HIGH)       # Yellow LED
-
-  GPIO.setup(PINS.TACT_LEFT, GPIO.IN, pull_up_down = GPIO.PUD_UP)  # Left key
-  GPIO.add_event_detect(PINS.TACT_LEFT, GPIO.FALLING, callback = on_left_key, bouncetime = 500)
-  signal.signal(signal.SIGUSR1, on_left_key)                       # SIGUSR1 as left key
-  GPIO.setup(PINS.TACT_RIGHT, GPIO.IN, pull_up_down = GPIO.PUD_UP) # Right Key
-  GPIO.add_event_detect(PINS.TACT_RIGHT, GPIO.FALLING, callback = on_right_key, bouncetime = 500)
-  signal.signal(signal.SIGUSR2, on_right_key)                      # SIGUSR2 as right key
+  bank.setup(PINS.GPIO_TRIGGER, GPIO.OUT, initial = GPIO.LOW)      # Ultrasonic Trigger
+  bank.setup(PINS.GPIO_ECHO, GPIO.IN, pull_up_down = GPIO.PUD_DOWN)# Ultrasonic Echo
+  if RANGING_MODE == 'edge':
+    try:
+      GPIO.add_event_detect(PINS.GPIO_ECHO, GPIO.BOTH, callback = on_echo_edge)
+    except RuntimeError:
+      print 'Unable to detect echo edges, polling instead.'
+      RANGING_MODE = 'poll'
+  bank.setup(PINS.BUZZER, GPIO.OUT, initial = GPIO.HIGH)           # Buzzer 
+  buzzer = Buzzer(PINS.BUZZER, GPIO.LOW)
+  bank.setup(PINS.LED_RED, GPIO.OUT, initial = GPIO.HIGH)          # Red LED
+  bank.setup(PINS.LED_YELLOW, GPIO.OUT, initial = GPIO.HIGH)       # Yellow LED
+
+  events.on('left', on_left_key)
+  events.on('right', on_right_key)
+  events.start(EVENT_PERIOD)
+  bank.setup(PINS.TACT_LEFT, GPIO.IN, pull_up_down = GPIO.PUD_UP)  # Left key
+  GPIO.add_event_detect(PINS.TACT_LEFT, GPIO.FALLING, callback = events.poster('left'), bouncetime = 500)
+  signal.signal(signal.SIGUSR1, events.poster('left'))             # SIGUSR1 as left key
+  bank.setup(PINS.TACT_RIGHT, GPIO.IN, pull_up_down = GPIO.PUD_UP) # Right Key
+  GPIO.add_event_detect(PINS.TACT_RIGHT, GPIO.FALLING, callback = events.poster('right'), bouncetime = 500)
+  signal.signal(signal.SIGUSR2, events.poster('right'))            # SIGUSR2 as right key
 
   display = DigitalDisplay()
 
   temperature = get_temperature()
   print 'Current temperature is', temperature, '*C.'
-  sound_speed = 33100 + (60 * temperature)
+  sound_speed = speed_of_sound(temperature)
   print 'Current speed of sound is', sound_speed, 'cm/s.'
 
+  try:
+    t2 = Thread(target = ranging_worker)
+    t2.setDaemon(True)
+    t2.start()
+  except:
+    print "Error: Unable to start thread by ranging"
+  try:
+    t3 = Thread(target = temperature_worker)
+    t3.setDaemon(True)
+    t3.start()
+  except:
+    print "Error: Unable to start thread by temperature"
+  try:
+    t4 = Thread(target = saver_worker)
+    t4.setDaemon(True)
+    t4.start()
+  except:
+    print "Error: Unable to start thread by saver"
+
 def done():
   '''
   Stop the program
   '''
   display.show('')
+  buzzer.stop()
   led('off')
   time.sleep(0.2)
-  GPIO.cleanup()
+  display.stop()
+  scheduler.stop()
+  bank.cleanup()
+
+def start():
+  '''
+  Reset the state of the main loop
+  '''
+  global relax_time, yday, show_safe, far_away, h, seq
+  relax_time = time.time()
+  yday = time.localtime().tm_yday
+  show_safe = 3
+  far_away = 0
+  h = 0
+  seq = -1
+
+def tick():
+  '''
+  One round of the main loop: judge the posture and update the display
+  '''
+  global relax_time, yday, show_safe, far_away, h, seq
+  t = time.time()
+  if time.localtime(t).tm_yday != yday: # new day
+    yday = time.localtime(t).tm_yday
+    counts.insert(0, [0, 0])
+    counts.pop()
+    save_later()
+  d = get_distance()
+  if d is None: # nothing measured yet
+    return
+  n = sample_count
+  for k in range(max(seq + 1, n - len(samples)), n): # track every sample, not just one per tick
+    i, ts, dist, v = samples[k % len(samples)]
+    if i == k and dist > 0: # 0 is no echo
+      posture.update(ts, dist)
+  seq = n - 1
+  if d <= safe_dist + 30:
+    far_away /= 10
+    counts[0][1] += 1
+    if d >= safe_dist:
+      counts[0][0] += 1
+      h = 0
+    else:
+      h += 1
+    if beep and posture.alert(t, safe_dist, ALERT_LEAD, ALERT_HOLD):
+      buzz()
+  else:
+    far_away += 1
+    h = -1
+    posture.reset()
+    relax_time += 2.5
+    if relax_time > t or t - relax_time >= 60 * 60:
+      relax_time = t
+  led('flashing' if t - relax_time >= 20 * 60 else 'off') # relax after 20 minutes studying ...
+  if mode == 0:
+    s = '%4d' % (d - safe_dist) if h > 1 else '    ' if h < 0 else ' .   '
+  elif mode == 1:
+    if show_safe > 0:
+      s = '=%3d' % safe_dist
+      show_safe -= 1
+    else:
+      s = '%4d' % d
+  else:
+    if show_days == 0:
+      score = counts[0][0] * 100 / (1 + counts[0][1])
+      s = 'C%3d' % score
+    else:
+      c0, c1 = 0, 1
+      for i, j in counts[1 : show_days + 1]:
+        c0 += i
+        c1 += j
+      score = c0 * 100 / c1
+      s = '%d%3d' % (show_days, score)
+  if far_away > 120:
+    s = '    '
+  display.show(s)
+  print '    %s [%-4s] %3dcm %ds %s    \r' % (time.ctime(), s, d, t - relax_time, counts[0]),
+  os.sys.stdout.flush()
 
 def run():
   '''
   Main loop
   '''
-  global mode, beep, safe_dist, show_safe, show_days, counts
+  start()
+  task = scheduler.every(TICK_PERIOD, tick, name = 'tick')
   try:
-    relax_time = time.time()
-    yday = time.localtime().tm_yday
-    show_safe = 3
-    far_away = 0
-    h = 0
-    while True:
-      t = time.time()
-      if time.localtime(t).tm_yday != yday: # new day
-        yday = time.localtime(t).tm_yday
-        counts.insert(0, [0, 0])
-        counts.pop()
-        save()
-      d = get_distance()
-      if d <= safe_dist + 30:
-        far_away /= 10
-        counts[0][1] += 1
-        if d >= safe_dist:
-          counts[0][0] += 1
-          h = 0
-        else:
-          h += 1
-          if beep and h > 1:
-            buzz()
-      else:
-        far_away += 1
-        h = -1
-        relax_time += 2.5
-        if relax_time > t or t - relax_time >= 60 * 60:
-          relax_time = t
-      led('flashing' if t - relax_time >= 20 * 60 else 'off') # relax after 20 minutes studying ...
-      if mode == 0:
-        s = '%4d' % (d - safe_dist) if h > 1 else '    ' if h < 0 else ' .   '
-      elif mode == 1:
-        if show_safe > 0:
-          s = '=%3d' % safe_dist
-          show_safe -= 1
-        else:
-          s = '%4d' % d
-      else:
-        if show_days == 0:
-          score = counts[0][0] * 100 / (1 + counts[0][1])
-          s = 'C%3d' % score
-        else:
-          c0, c1 = 0, 1
-          for i, j in counts[1 : show_days + 1]:
-            c0 += i
-            c1 += j
-          score = c0 * 100 / c1
-          s = '%d%3d' % (show_days, score)
-      if far_away > 120:
-        s = '    '
-      display.show(s)
-      print '    %s [%-4s] %3dcm %ds %s    \r' % (time.ctime(), s, d, t - relax_time, counts[0]),
-      os.sys.stdout.flush()
-      t += 0.5 - time.time()
-      if t > 0:
-        time.sleep(t)
+    while task.active: # the scheduler runs the loop, this thread only waits for Ctrl-C
+      time.sleep(1)
   except KeyboardInterrupt:
     print
+  task.cancel()
+  events.stop()
+  print 'Scheduler:', scheduler.report()
+  print 'Events:', events.report()
 
-init()
-load()
-run()
-save()
-done()
+if __name__ == '__main__':
+  init()
+  load()
+  run()
+  save()
+  done()
 
 